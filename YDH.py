@@ -1,96 +1,119 @@
 # ----- Import Basic Packages ----- #
 import pandas as pd
 import json
-import re
-from datetime import datetime
-import isodate
-from textblob import TextBlob
-from langdetect import detect
+import threading
 import streamlit as st
 from streamlit_option_menu import option_menu
 import plotly.express as px
-import traceback
-from itertools import cycle
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # --------- Import Packages for DB --------- #
 from pymongo import MongoClient, errors
-import psycopg2
-from psycopg2.extras import execute_values
-from psycopg2 import DatabaseError
 
-# ------ Import Package for Google API ------ #
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+# ------ Import the shared harvesting / warehouse core ------ #
+from reporter import Reporter, use_reporter
+from harvest import (
+    configure_api_keys, safe_api_call, get_quota_ledger, get_quota_remaining,
+    quota_day, expire_api_cache, get_channel_stats, get_all_playlists_for_channel,
+    estimate_harvest_cost, load_channel_data, PROJECT_DAILY_QUOTA, MONGO_DB_NAME,
+    PLAYLISTS_COL, VIDEOS_COL, COMMENTS_COL,
+    ensure_mongo_indexes, list_harvested_channels, delete_channel, get_channel_summary,
+    top_videos, browse_channel_docs, iter_channel_docs, BROWSE_PAGE_SIZE,
+)
+from postgres_db import get_pg_pool
+from analyzer import ANALYZER_PAGE_SIZE, QueryCache, run_queries
+from jobs import JobQueue, JOB_SUCCEEDED, JOB_FAILED, JOB_INTERRUPTED, ACTIVE_STATES
 
 # ---------- Complete YouTube API Management --------------- #
 # ---- API Keys ---- from .streamlit/secrets.toml #
-YOUTUBE_API_KEYS_P1 = st.secrets["youtube1"]["api_keys"]  # Project 1 — 10,000 quota
-YOUTUBE_API_KEYS_P2 = st.secrets["youtube2"]["api_keys"]  # Project 2 — 10,000 quota
-YOUTUBE_API_KEYS = [
-    key for pair in zip(YOUTUBE_API_KEYS_P1, YOUTUBE_API_KEYS_P2)
-    for key in pair
-]
-# Cycle through the interleaved keys
-api_key_cycle = cycle(YOUTUBE_API_KEYS)
+configure_api_keys(
+    st.secrets["youtube1"]["api_keys"],  # Project 1 — 10,000 quota
+    st.secrets["youtube2"]["api_keys"],  # Project 2 — 10,000 quota
+)
 
 # ---- Session-level API quota usage tracker ---- #
 if "quota_used" not in st.session_state:
     st.session_state.quota_used = 0
+# Guards quota_used when API calls run on worker threads
+quota_lock = threading.Lock()
+
+# ---- Streamlit side of the pipeline reporter ---- #
+class StreamlitReporter(Reporter):
+    """Renders harvest / migration messages on the current Streamlit page.
+    Worker threads are attached to the script-run context before touching st.*,
+    and the progress bar is created on first use.
+    """
 
-# ---- Quota per endpoint (approx. official) ---- #
-API_COST_MAP = {
-    "channels().list": 1,
-    "search().list": 100,
-    "videos().list": 1,
-    "commentThreads().list": 1,
-    "playlistItems().list": 1,
-    "playlists().list": 1,
-}
+    def __init__(self):
+        super().__init__()
+        self.ctx = get_script_run_ctx()
+        self.progress_bar = None
 
-# ---- Build API Key Service with Given Key ---- #
-@st.cache_resource
-def get_youtube_api(api_key):
-    return build("youtube", "v3", developerKey=api_key)
+    def _attach(self):
+        if get_script_run_ctx(suppress_warning=True) is None and self.ctx is not None:
+            add_script_run_ctx(threading.current_thread(), self.ctx)
 
-# ---- Get API Key and build service - Rotation Helper ---- #
-def get_next_youtube_service():
-    """Cycles through API keys and returns (key, service)."""
-    try:
-        api_key = next(api_key_cycle)
-        youtube_service = get_youtube_api(api_key)
-        return api_key, youtube_service
-    except Exception as e:
-        st.error(f"❌ Failed to create YouTube service: {e}")
-        return None, None
-
-# ---- Quota Increment Helper ---- #
-def increment_quota(cost_key):
-    cost = API_COST_MAP.get(cost_key, 1)
-    st.session_state.quota_used += cost
+    def info(self, message):
+        self._attach()
+        st.info(message)
+
+    def success(self, message):
+        self._attach()
+        st.success(message)
+
+    def warning(self, message):
+        self._attach()
+        st.warning(message)
+
+    def error(self, message):
+        self._attach()
+        st.error(message)
+
+    def progress(self, fraction, text=""):
+        self._attach()
+        if self.progress_bar is None:
+            self.progress_bar = st.progress(fraction, text=text)
+        else:
+            self.progress_bar.progress(fraction, text)
+
+    def spinner(self, text):
+        self._attach()
+        return st.spinner(text)
+
+    def quota(self, units):
+        super().quota(units)
+        self._attach()
+        with quota_lock:
+            st.session_state.quota_used += units
 
 # --------- Track YouTube API usage and display ---------- #
 def show_quota_usage():
-    total_quota = 20000
-    per_project = 10000
-    used = st.session_state.get("quota_used", 0)
-    remaining = total_quota - used
+    per_project = PROJECT_DAILY_QUOTA
+    total_quota = 2 * per_project
+    ledger = get_quota_ledger()
+    used = ledger[1]["units"] + ledger[2]["units"]
+    remaining = get_quota_remaining()
+    session_used = st.session_state.get("quota_used", 0)
     # ── Metric cards ──
     m1, m2, m3 = st.columns(3)
     m1.metric("🔢 Total Quota", f"{total_quota:,} units")
-    m2.metric("✅ Total Used", f"{used:,} units")
+    m2.metric("✅ Total Used Today", f"{used:,} units")
     m3.metric("🟢 Remaining", f"{remaining:,} units",
               delta=f"-{used} used", delta_color="inverse")
     n1, n2 = st.columns(2)
-    n1.metric("📁 Project 1 Est.", f"{min(used, per_project)} / {per_project}")
-    n2.metric("📁 Project 2 Est.", f"{max(0, used - per_project):,} / {per_project:,}")
+    for col, project in ((n1, 1), (n2, 2)):
+        p = ledger[project]
+        label = f"📁 Project {project}" + (" 🚫" if p["exhausted"] else "")
+        col.metric(label, f"{p['units']:,} / {per_project:,}")
+    st.caption(f"Ledger day {quota_day()} (Pacific) · this session: {session_used:,} units")
 
     # ── Progress bar with colour warning ──
     pct = min(used / total_quota, 1.0)
     st.progress(pct)
-    if used >= 10000:
-        st.warning("⚠️ Project 1 quota likely exhausted. Running on Project 2 keys.")
-    elif used >= 20000:
+    if remaining <= 0:
         st.error("🚫 All quota exhausted for today. Resets at midnight Pacific Time.")
+    elif ledger[1]["exhausted"] or ledger[1]["units"] >= per_project:
+        st.warning("⚠️ Project 1 quota exhausted. Running on Project 2 keys.")
     elif pct >= 0.9:
         st.error("🚫 Over 90% quota used. Resets at midnight Pacific Time.")
     elif pct >= 0.7:
@@ -101,43 +124,11 @@ def show_quota_usage():
         st.info("🕒 No quota used yet today.")
 
     # ── Action button - Reset ── #
-    if st.button("🔄 Reset Quota Counter", use_container_width=True):
+    if st.button("🔄 Reset Session Counter", use_container_width=True,
+                 help="Resets this session's counter only — the daily ledger is kept"):
         st.session_state.quota_used = 0
         st.rerun()
 
-# ---- Pre-Wrapped Helper: Quota Tracking and Error Handling ---- #
-def safe_api_call(service_function, cost_key=None):
-    """Wrap a YouTube API call with key rotation, quota tracking, and error handling.
-    service_function must accept a youtube service object and return the response:
-        lambda yt: yt.channels().list(...).execute()
-    """
-    for _ in range(len(YOUTUBE_API_KEYS)):
-        api_key, youtube_api = get_next_youtube_service()
-        if not youtube_api:
-            continue
-        try:
-            response = service_function(youtube_api)
-            increment_quota(cost_key)
-            return response
-        except HttpError as e:
-            error_reason = ""
-            try:
-                error_reason = e.error_details[0]["reason"]
-            except Exception:
-                pass
-
-            if "quotaExceeded" in str(e) or error_reason == "quotaExceeded":
-                st.warning(f"🔁 Quota exceeded for key `{api_key}`. Trying next key...")
-                continue
-            else:
-                # 403 on commentThreads is expected — don't alarm the user
-                if e.resp.status not in [403, 400]:
-                    st.error(f"❌ API Error: {e}")
-                return None
-
-    st.error("🚫 All API keys exhausted or failed.")
-    return None
-
 # ----------- MongoDB Setup -------------- #
 @st.cache_resource
 def get_mongo_client():
@@ -145,622 +136,65 @@ def get_mongo_client():
     try:
         client = MongoClient(mongo_url, serverSelectionTimeoutMS=3000)
         client.admin.command("ping")
+        ensure_mongo_indexes(client[MONGO_DB_NAME])
         return client
     except errors.ServerSelectionTimeoutError as e:
         st.error(f"❌ Failed to connect to MongoDB: {e}")
         st.stop()
 
 client = get_mongo_client()
-mg_yth_db = client["YouTubeHarvest"]
-collection_list = mg_yth_db.list_collection_names()
-
-# ---- Helper: sanitize collection names ---- #
-# def sanitize(name):
-#     return re.sub(r"[.$]", "_", name)
+mg_yth_db = client[MONGO_DB_NAME]
 
 # -------- Initialize Postgres connection --------- #
-@st.cache_resource
 def init_connection():
-    return psycopg2.connect(**st.secrets["postgres"])
+    """Borrow a connection from the process-wide PostgreSQL pool (use as a context manager)."""
+    return get_pg_pool(dict(st.secrets["postgres"])).connection()
 
+# -------- Analyzer result cache (shared by all sessions) --------- #
+@st.cache_resource
+def get_query_cache():
+    return QueryCache()
 
-# ---- Video ID validator ---- #
-def is_valid_video_id(video_id):
-    """Validate YouTube video ID: exactly 11 characters (letters, digits, - or _)."""
-    return bool(re.fullmatch(r"[a-zA-Z0-9_-]{11}", video_id))
-
+# -------- Background job queue (shared by all sessions) --------- #
+JOB_POLL_SECONDS = 2
 
-# ---- ISO 8601 duration → HH:MM:SS ---- #
-def parse_duration_to_hms(duration_str):
-    try:
-        duration = isodate.parse_duration(duration_str)
-        total_seconds = int(duration.total_seconds())
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        seconds = total_seconds % 60
-        return f"{hours:02}:{minutes:02}:{seconds:02}"
-    except Exception:
-        return None
+@st.cache_resource
+def get_job_queue():
+    return JobQueue(mg_yth_db, dict(st.secrets["postgres"]))
 
-# ============================================================
-# PostgreSQL - DB Operations
-# ============================================================
-def store_postgresql_direct(conn, data):
-    """Store basic channel info directly to PostgreSQL right after harvest."""
-    with st.spinner("🔧 Storing basic channel info in PostgreSQL..."):
-        try:
-            ch_basic = data.get("Channel_info", {})
-            channel_id = ch_basic.get("Channel_Id")
-            if not channel_id:
-                st.error("❌ Channel_Id is missing. Skipping database insert.")
-                return
-            with conn.cursor() as cur:
-                cur.execute("""
-                    CREATE TABLE IF NOT EXISTS channel_table_direct (
-                        channel_id    VARCHAR(50) PRIMARY KEY,
-                        channel_name  VARCHAR(255),
-                        subscribers   BIGINT,
-                        channel_views BIGINT,
-                        total_videos  BIGINT,
-                        harvested_time TIMESTAMP
-                    );
-                """)
-                cur.execute("""
-                    INSERT INTO channel_table_direct
-                        (channel_id, channel_name, subscribers, channel_views, total_videos, harvested_time)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (channel_id) DO UPDATE SET
-                        channel_name   = EXCLUDED.channel_name,
-                        subscribers    = EXCLUDED.subscribers,
-                        channel_views  = EXCLUDED.channel_views,
-                        total_videos   = EXCLUDED.total_videos,
-                        harvested_time = EXCLUDED.harvested_time;
-                """, (
-                    channel_id,
-                    ch_basic.get("Channel_name"),
-                    int(ch_basic.get("Subscribers", 0)),
-                    int(ch_basic.get("Views", 0)),
-                    int(ch_basic.get("Total_videos", 0)),
-                    datetime.now(),
-                ))
-            conn.commit()
-            st.success("✅ Basic Channel Data stored in PostgreSQL")
-        except Exception as e:
-            conn.rollback()
-            st.error(f"❌ Direct PostgreSQL store failed: {e}")
-
-
-def create_postgresql_tables(conn):
-    """Create all four normalised tables if they do not already exist."""
-    with st.spinner("🔧 Creating PostgreSQL tables..."):
-        try:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    CREATE TABLE IF NOT EXISTS channel_table (
-                        channel_id    VARCHAR(50) PRIMARY KEY,
-                        channel_name  VARCHAR(255),
-                        subscribers   BIGINT,
-                        channel_views BIGINT,
-                        total_videos  BIGINT,
-                        harvested_time TIMESTAMP
-                    );
-                """)
-                cur.execute("""
-                    CREATE TABLE IF NOT EXISTS channel_playlist (
-                        playlist_id    VARCHAR(255) PRIMARY KEY,
-                        playlist_name  VARCHAR(255),
-                        channel_name   VARCHAR(255),
-                        channel_id     VARCHAR(255),
-                        description    TEXT,
-                        item_count     INT,
-                        privacy_status VARCHAR(50),
-                        published_at   TIMESTAMP,
-                        harvested_at   TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    );
-                """)
-                cur.execute("""
-                    CREATE TABLE IF NOT EXISTS channel_videos (
-                        video_id          VARCHAR(50) PRIMARY KEY,
-                        playlist_id       VARCHAR(50),
-                        video_name        VARCHAR(500),
-                        video_description TEXT,
-                        published_date    TIMESTAMP,
-                        category_id       INT,
-                        duration          TIME,
-                        video_quality     VARCHAR(20),
-                        licensed          VARCHAR(10),
-                        view_count        BIGINT,
-                        like_count        INT,
-                        dislike_count     INT,
-                        favorite_count    INT,
-                        comments_count    INT,
-                        thumbnail         VARCHAR(500),
-                        caption_status    VARCHAR(150)
-                    );
-                """)
-                cur.execute("""
-                    CREATE TABLE IF NOT EXISTS channel_comments (
-                        comment_id      VARCHAR(50) PRIMARY KEY,
-                        video_id        VARCHAR(50),
-                        channel_name    VARCHAR(255),
-                        comment_text    TEXT,
-                        comment_date    TIMESTAMP,
-                        comment_author  VARCHAR(255),
-                        comment_like    INT     DEFAULT 0,
-                        reply_count     INT     DEFAULT 0,
-                        is_pinned       BOOLEAN DEFAULT FALSE,
-                        is_hearted      BOOLEAN DEFAULT FALSE,
-                        language        VARCHAR(10),
-                        sentiment_score FLOAT,
-                        harvested_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    );
-                """)
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            st.error(f"❌ Table creation failed: {e}")
-
-def migrate_to_postgresql(conn, selected_channel, mg_yth_db):
-    """Migrate a harvested channel from MongoDB to PostgreSQL."""
-    try:
-        progress_bar = st.progress(0, text="📤 Starting migration...")
-        create_postgresql_tables(conn)
-
-        # ------ Fetch from MongoDB ------ #
-        meta = mg_yth_db[f"{selected_channel}_meta"].find_one()
-        if not meta:
-            st.error(f"⚠️ No meta data found for: {selected_channel}")
-            return
-
-        playlists = list(mg_yth_db[f"{selected_channel}_playlist"].find())
-        videos    = list(mg_yth_db[f"{selected_channel}_videos"].find())
-        comments  = list(mg_yth_db[f"{selected_channel}_comments"].find())
-
-        # Remove MongoDB ObjectIds
-        def strip_ids(docs):
-            for d in docs:
-                if isinstance(d, dict):
-                    d.pop("_id", None)
-            return docs
-
-        meta      = strip_ids([meta])[0]
-        playlists = strip_ids(playlists)
-        videos    = strip_ids(videos)
-        comments  = strip_ids(comments)
-
-        # ---- Validate required fields before any DB write ---- #
-        channel_id_val   = meta.get("Channel_Id")
-        channel_name_val = meta.get("Channel_name")
-        subscribers_val  = meta.get("Subscribers")
-        if not all([channel_id_val, channel_name_val, subscribers_val is not None]):
-            st.error("❌ Missing essential metadata fields (Channel_Id / Channel_name / Subscribers). Aborting.")
-            return
-
-        # ---- Insert channel row ---- #
-        progress_bar.progress(0.2, "📦 Inserting channel metadata...")
-        with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO channel_table
-                    (channel_id, channel_name, subscribers, channel_views, total_videos, harvested_time)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                ON CONFLICT (channel_id) DO UPDATE SET
-                    channel_name   = EXCLUDED.channel_name,
-                    subscribers    = EXCLUDED.subscribers,
-                    channel_views  = EXCLUDED.channel_views,
-                    total_videos   = EXCLUDED.total_videos,
-                    harvested_time = EXCLUDED.harvested_time;
-            """, (
-                channel_id_val,
-                channel_name_val,
-                int(subscribers_val),
-                int(meta.get("Views", 0)),
-                int(meta.get("Total_videos", 0)),
-                datetime.now(),
-            ))
-
-        # ---- Insert playlists ---- #
-        progress_bar.progress(0.3, "🎞 Inserting playlist records...")
-        if playlists:
-            playlist_rows = [
-                (
-                    p.get("playlist_id"),
-                    p.get("playlist_name") or p.get("playlist_title"),
-                    selected_channel,
-                    p.get("channel_id") or channel_id_val,
-                    p.get("description", ""),
-                    int(p.get("item_count", 0)),
-                    p.get("privacy_status", ""),
-                    p.get("published_at"),
-                    datetime.now(),
-                )
-                for p in playlists
-            ]
-            with conn.cursor() as cur:
-                execute_values(cur, """
-                    INSERT INTO channel_playlist
-                        (playlist_id, playlist_name, channel_name, channel_id, description,
-                         item_count, privacy_status, published_at, harvested_at)
-                    VALUES %s ON CONFLICT (playlist_id) DO NOTHING;
-                """, playlist_rows)
-
-        # ---- Insert videos ---- #
-        progress_bar.progress(0.45, "🎞 Inserting video records...")
-        if videos:
-            video_rows = [
-                (
-                    v.get("video_id"),
-                    v.get("playlist_id"),
-                    v.get("video_title"),
-                    v.get("description", ""),
-                    v.get("published_at"),
-                    int(v.get("category_id", 0)),
-                    parse_duration_to_hms(v.get("duration")),
-                    v.get("definition", "hd"),
-                    v.get("licensed_content", "No"),
-                    int(v.get("view_count", 0)),
-                    int(v.get("like_count", 0)),
-                    int(v.get("dislike_count", 0)),
-                    int(v.get("favorite_count", 0)),
-                    int(v.get("comment_count", 0)),
-                    v.get("thumbnail", ""),
-                    v.get("caption_status", "Unknown"),
-                )
-                for v in videos
-            ]
-            with conn.cursor() as cur:
-                execute_values(cur, """
-                    INSERT INTO channel_videos
-                        (video_id, playlist_id, video_name, video_description, published_date,
-                         category_id, duration, video_quality, licensed, view_count, like_count,
-                         dislike_count, favorite_count, comments_count, thumbnail, caption_status)
-                    VALUES %s ON CONFLICT (video_id) DO NOTHING;
-                """, video_rows)
-        else:
-            st.info("No videos to migrate.")
-
-        # ---- Insert comments ---- #
-        progress_bar.progress(0.7, "💬 Inserting comment records...")
-        if comments:
-            comment_rows = []
-            for c in comments:
-                text = c.get("comment_text", "") or ""
-                try:
-                    sentiment = TextBlob(text).sentiment.polarity
-                    lang = detect(text) if text.strip() else "en"
-                except Exception:
-                    sentiment = None
-                    lang = "en"
-                comment_rows.append((
-                    c.get("comment_id"),
-                    c.get("video_id"),
-                    selected_channel,
-                    text,
-                    c.get("comment_date"),
-                    c.get("author"),
-                    int(c.get("like_count", 0)),
-                    int(c.get("reply_count", 0)),
-                    bool(c.get("is_pinned", False)),
-                    bool(c.get("is_hearted", False)),
-                    lang,
-                    sentiment,
-                    datetime.now(),
-                ))
-            with conn.cursor() as cur:
-                execute_values(cur, """
-                    INSERT INTO channel_comments
-                        (comment_id, video_id, channel_name, comment_text, comment_date,
-                         comment_author, comment_like, reply_count, is_pinned, is_hearted,
-                         language, sentiment_score, harvested_at)
-                    VALUES %s ON CONFLICT (comment_id) DO NOTHING;
-                """, comment_rows)
-        else:
-            st.info("No comments to migrate.")
+job_queue = get_job_queue()
 
-        conn.commit()
-        progress_bar.progress(1.0, "✅ Migration complete!")
-        st.success(f"✅ Channel '{selected_channel}' migrated to PostgreSQL")
-        st.write(f"📦 {len(videos)} videos · {len(comments)} comments migrated.")
+JOB_STATUS_ICONS = {
+    "queued": "🕒", "waiting_for_quota": "⏳", "running": "⚙️",
+    JOB_SUCCEEDED: "✅", JOB_FAILED: "❌", JOB_INTERRUPTED: "⚠️",
+}
 
-    except Exception as e:
-        conn.rollback()
-        st.error(f"❌ Migration failed: {e}")
-        traceback.print_exc()
-# ============================================================
-# YouTube API Data Fetching Functions
-# All functions use the _param (underscore-prefix) convention
-# for @st.cache_data and pass it explicitly into every lambda
-# to avoid closure / global-variable bugs.
-# ============================================================
-@st.cache_data
-def get_channel_stats(_channel_id):
-    """Fetch top-level channel statistics and the uploads playlist ID."""
-    response = safe_api_call(
-        lambda yt: yt.channels().list(
-            part="snippet,contentDetails,statistics",
-            id=_channel_id,
-        ).execute(),
-        cost_key="channels().list",
-    )
-    if not response or not response.get("items"):
-        return None
-    try:
-        item = response["items"][0]
-        return {
-            "Channel_Id":    _channel_id,
-            "Channel_name":  item["snippet"]["title"],
-            "Subscribers":   item["statistics"].get("subscriberCount", 0),
-            "Views":         item["statistics"].get("viewCount", 0),
-            "Total_videos":  item["statistics"].get("videoCount", 0),
-            # uploads playlist — contains EVERY uploaded video including non-playlist ones
-            "playlist_id":   item["contentDetails"]["relatedPlaylists"]["uploads"],
-        }
-    except KeyError:
-        return None
-
-@st.cache_data
-def get_all_playlists_for_channel(_channel_id, channel_name):
-    """Fetch all public playlists the channel has created."""
-    playlists = []
-    next_page_token = None
-    while True:
-        # Capture _channel_id and next_page_token in default args to avoid closure bugs
-        response = safe_api_call(
-            lambda yt, cid=_channel_id, tok=next_page_token: yt.playlists().list(
-                part="snippet,contentDetails,status",
-                channelId=cid,
-                maxResults=50,
-                pageToken=tok,
-            ).execute(),
-            cost_key="playlists().list",
-        )
-        if not response:
-            break
-        for item in response.get("items", []):
-            playlists.append({
-                "playlist_id":    item["id"],
-                "playlist_name":  item["snippet"]["title"],
-                "channel_name":   channel_name,
-                "channel_id":     _channel_id,
-                "description":    item["snippet"].get("description", ""),
-                "item_count":     item["contentDetails"].get("itemCount", 0),
-                "privacy_status": item["status"].get("privacyStatus", "public"),
-                "published_at":   item["snippet"].get("publishedAt"),
-                "harvested_at":   datetime.now().isoformat(),
-            })
-        next_page_token = response.get("nextPageToken")
-        if not next_page_token:
-            break
-    return playlists
-
-# @st.cache_data
-def get_videos_from_playlist(_playlist_id, max_results=500):
-    """
-    Fetch all video details from a single playlist (or the uploads playlist).
-    Works for both named playlists AND the hidden 'uploads' playlist that
-    contains every video a channel has ever uploaded — including videos that
-    were never added to any named playlist.
-    """
-    videos = []
-    next_page_token = None
-
-    while True:
-        # Step 1: get a page of video IDs from the playlist
-        playlist_response = safe_api_call(
-            lambda yt, pid=_playlist_id, tok=next_page_token: yt.playlistItems().list(
-                part="snippet,contentDetails",
-                playlistId=pid,
-                maxResults=50,
-                pageToken=tok,
-            ).execute(),
-            cost_key="playlistItems().list",
-        )
-        if not playlist_response:
-            break
-
-        video_ids = [
-            item["contentDetails"]["videoId"]
-            for item in playlist_response.get("items", [])
-        ]
-        if not video_ids:
-            break
-
-        # Step 2: batch-fetch full video details for those IDs
-        video_response = safe_api_call(
-            lambda yt, ids=",".join(video_ids): yt.videos().list(
-                part="snippet,contentDetails,statistics",
-                id=ids,
-            ).execute(),
-            cost_key="videos().list",
-        )
-        if not video_response:
-            break
-
-        for item in video_response.get("items", []):
-            snippet    = item.get("snippet", {})
-            stats      = item.get("statistics", {})
-            content    = item.get("contentDetails", {})
-            videos.append({
-                "video_id":       item["id"],
-                "playlist_id":    _playlist_id,
-                "video_title":    snippet.get("title", ""),
-                "description":    snippet.get("description", ""),
-                "published_at":   snippet.get("publishedAt"),
-                "category_id":    snippet.get("categoryId", 0),
-                "thumbnail":      snippet.get("thumbnails", {}).get("high", {}).get("url", ""),
-                "duration":       content.get("duration", "PT0S"),
-                "definition":     content.get("definition", "hd"),
-                "caption_status": content.get("caption", "false"),
-                "licensed_content": str(content.get("licensedContent", False)),
-                "view_count":     int(stats.get("viewCount", 0)),
-                "like_count":     int(stats.get("likeCount", 0)),
-                "dislike_count":  int(stats.get("dislikeCount", 0)),
-                "favorite_count": int(stats.get("favoriteCount", 0)),
-                "comment_count":  int(stats.get("commentCount", 0)),
-            })
-
-        if len(videos) >= max_results:
-            break
-
-        next_page_token = playlist_response.get("nextPageToken")
-        if not next_page_token:
-            break
-
-    return videos
-
-# @st.cache_data
-def get_comments_for_video(_video_id, max_comments=20):
-    """
-    Fetch up to max_comments top-level comments for a single video.
-    Returns [] silently if comments are disabled on the video.
-    """
-    comments = []
-    next_page_token = None
-
-    while len(comments) < max_comments:
-        remaining = max_comments - len(comments)
-        try:
-            response = safe_api_call(
-                lambda yt, vid=_video_id, tok=next_page_token, n=min(remaining, 20): yt.commentThreads().list(
-                    part="snippet",
-                    videoId=vid,
-                    maxResults=n,
-                    pageToken=tok,
-                    textFormat="plainText",
-                ).execute(),
-                cost_key="commentThreads().list",
-            )
-        except HttpError as e:
-            # 403 = comments disabled/restricted — skip silently
-            if e.resp.status in [403, 404]:
-                break
-            return None
-        if not response:
-            break
-
-        for item in response.get("items", []):
-            top = item["snippet"]["topLevelComment"]["snippet"]
-            comments.append({
-                "comment_id":   item["id"],
-                "video_id":     _video_id,
-                "comment_text": top.get("textDisplay", ""),
-                "author":       top.get("authorDisplayName", ""),
-                "like_count":   top.get("likeCount", 0),
-                "reply_count":  item["snippet"].get("totalReplyCount", 0),
-                "comment_date": top.get("publishedAt"),
-                "is_pinned":    False,
-                "is_hearted":   False,
-            })
-
-        next_page_token = response.get("nextPageToken")
-        if not next_page_token:
-            break
-
-    return comments
-
-# @st.cache_data(ttl=3600, show_spinner=False)
-def extract_channel_all_details(_channel_id):
-    """
-    Full harvest pipeline for one channel.
-
-    Video strategy
-    ──────────────
-    1. Fetch the 'uploads' playlist — this contains EVERY video the channel
-       has ever uploaded, including videos not in any named playlist.
-    2. Also fetch all named playlists (for playlist metadata / relationships).
-    3. Deduplicate videos by video_id so a video appearing in both the uploads
-       playlist and a named playlist is only stored once.
-    """
-    progress = st.progress(0.0, text="📤 Starting YouTube channel harvest...")
-
-    # ── 1. Channel statistics ──────────────────────────────────────────────
-    with st.spinner("Fetching channel statistics..."):
-        channel_stats = get_channel_stats(_channel_id)
-        if not channel_stats:
-            st.warning("⚠️ Channel statistics not available.")
-            return None
-        channel_name     = channel_stats.get("Channel_name", "Unknown")
-        uploads_pl_id    = channel_stats.get("playlist_id")   # hidden uploads playlist
-    progress.progress(0.05, "✅ Channel stats fetched.")
-
-    # ── 2. Named playlists ────────────────────────────────────────────────
-    with st.spinner("📂 Fetching all named playlists..."):
-        named_playlists = get_all_playlists_for_channel(_channel_id, channel_name)
-    progress.progress(0.15, f"✅ {len(named_playlists)} named playlist(s) found.")
-
-    # ── 3. Videos from ALL named playlists ───────────────────────────────
-    all_videos_map = {}   # keyed by video_id for deduplication
-
-    total_named = len(named_playlists)
-    for idx, pl in enumerate(named_playlists):
-        pid = pl["playlist_id"]
-        with st.spinner(f"📹 Fetching videos from playlist {idx + 1}/{total_named}: {pl['playlist_name']}"):
-            pl_videos = get_videos_from_playlist(pid)
-            for v in pl_videos:
-                all_videos_map[v["video_id"]] = v
-        pct = 0.15 + 0.25 * ((idx + 1) / max(total_named, 1))
-        progress.progress(pct, f"Playlist {idx + 1}/{total_named} done.")
-
-    # ── 4. Videos from uploads playlist (catches non-playlist uploads) ────
-    with st.spinner("📹 Fetching all uploaded videos (including those not in any playlist)..."):
-        if uploads_pl_id:
-            upload_videos = get_videos_from_playlist(uploads_pl_id)
-            new_count = 0
-            for v in upload_videos:
-                if v["video_id"] not in all_videos_map:
-                    # Mark that this video has no named playlist
-                    v["playlist_id"] = None
-                    all_videos_map[v["video_id"]] = v
-                    new_count += 1
-            if new_count:
-                st.info(f"ℹ️ {new_count} additional video(s) found outside named playlists.")
-    progress.progress(0.45, f"✅ {len(all_videos_map)} unique video(s) collected.")
-
-    all_videos  = list(all_videos_map.values())
-    video_ids   = [v["video_id"] for v in all_videos]
-
-    # Validate video IDs
-    valid_ids   = [vid for vid in video_ids if is_valid_video_id(vid)]
-    skipped     = len(video_ids) - len(valid_ids)
-    if skipped:
-        st.warning(f"⚠️ {skipped} invalid video ID(s) skipped.")
-    video_ids = valid_ids
-
-    # ── 5. Comments for each video ────────────────────────────────────────
-    all_comments = []
-    total_vids   = len(video_ids)
-    with st.spinner("💬 Fetching comments..."):
-        for i, vid in enumerate(video_ids):
-            vid_comments = get_comments_for_video(vid, max_comments=50)
-            all_comments.extend(vid_comments)
-            pct = 0.45 + 0.45 * ((i + 1) / max(total_vids, 1))
-            progress.progress(pct, f"Comments: video {i + 1}/{total_vids}")
-    progress.progress(0.95, "✅ Comments fetched.")
-
-    # ── 6. Pack result ────────────────────────────────────────────────────
-    channel_data = {
-        "Channel_info":  channel_stats,
-        "playlist_info": named_playlists,
-        "Video_info":    all_videos,
-        "Comment_info":  all_comments,
-        "Meta": {
-            "Total_Videos":   len(all_videos),
-            "Total_Comments": len(all_comments),
-        },
-        "last_updated": datetime.now().isoformat(),
-    }
-
-    # Audit log
-    mg_yth_db["audit_logs"].insert_one({
-        "channel_id":    _channel_id,
-        "channel_name":  channel_name,
-        "status":        "success",
-        "video_count":   len(all_videos),
-        "comment_count": len(all_comments),
-        "timestamp":     datetime.now().isoformat(),
-    })
-
-    progress.progress(1.0, "✅ Harvest complete!")
-    return channel_data
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_jobs_panel(kind, limit=5):
+    """Poll the jobs collection and render the latest jobs of one kind."""
+    jobs = job_queue.list_jobs(limit=limit, kind=kind)
+    if not jobs:
+        st.caption("No background jobs yet.")
+        return
+    for job in jobs:
+        params = job.get("params", {})
+        target = params.get("channel_name") or params.get("channel_id")
+        icon = JOB_STATUS_ICONS.get(job["status"], "•")
+        with st.container(border=True):
+            st.markdown(f"{icon} **{kind.capitalize()}** · `{target}` · {job['status']}")
+            if job["status"] in ACTIVE_STATES:
+                st.progress(min(job.get("progress", 0.0), 1.0), text=job.get("stage", ""))
+            counts = job.get("counts", {})
+            if counts:
+                st.caption(" · ".join(f"{k}: {v:,}" for k, v in counts.items())
+                           + f" · quota: {job.get('quota_used', 0):,} units")
+            if job.get("error"):
+                st.error(f"❌ {job['error']}")
+            messages = job.get("messages", [])
+            if messages:
+                with st.expander(f"Messages ({len(messages)})"):
+                    for m in messages[-10:]:
+                        st.caption(f"{m['at'][11:19]} · {m['message']}")
 
 # ============================================================
 # Streamlit UI
@@ -790,12 +224,12 @@ if "tested_channel_name" not in st.session_state:
     st.session_state.tested_channel_name = "No Channel to Display"
 if "quota_used" not in st.session_state:
     st.session_state.quota_used = 0
-if "extracted_data" not in st.session_state:
-    st.session_state.extracted_data = {}
-if "extracted_channel_id" not in st.session_state:
-    st.session_state.extracted_channel_id = None
+if "extract_job_id" not in st.session_state:
+    st.session_state.extract_job_id = None
 if "delete_requested" not in st.session_state:
     st.session_state.delete_requested = None
+if "full_view_channel" not in st.session_state:
+    st.session_state.full_view_channel = None
 
 # ==============================
 # HOME
@@ -856,7 +290,7 @@ if selected == "YDH_DB":
                 )
 
             if test_btn:
-                with st.spinner("Testing YouTube API connection..."):
+                with st.spinner("Testing YouTube API connection..."), use_reporter(StreamlitReporter()):
                     try:
                         test_resp = safe_api_call(
                             lambda yt: yt.channels().list(
@@ -921,27 +355,38 @@ if selected == "YDH_DB":
             )
 
             # Action buttons + options
-            act_c1, act_c2 = st.columns([1, 2])
+            act_c1, act_c2, act_c3 = st.columns([1, 1, 2])
             with act_c1:
                 Search = st.button("🔎 Search Channel", use_container_width=True)
             with act_c2:
+                Estimate = st.button("🧮 Estimate Cost", use_container_width=True,
+                                     help="Dry run — predicts quota units and duration of a full harvest")
+            with act_c3:
                 Extract = st.button("⬇️ Extract & Save to MongoDB", use_container_width=True)
 
-            opt_c1, opt_c2, opt_c3 = st.columns([1, 1, 1])
+            opt_c1, opt_c2, opt_c3, opt_c4 = st.columns([1, 1, 1, 1])
             with opt_c1:
                 store_pgsql = st.checkbox("📦 Also store in PostgreSQL")
             with opt_c2:
                 export_json = st.checkbox("🗃️ Export as JSON")
             with opt_c3:
+                incremental = st.checkbox(
+                    "♻️ Incremental refresh",
+                    help="Only fetch new uploads, and comments for new or changed videos, "
+                         "if this channel is already in MongoDB",
+                )
+            with opt_c4:
                 if st.button("🧹 Clear Extraction Cache", use_container_width=True,
                              help="Clears cached API responses — forces a fresh fetch on next extraction"):
                     st.cache_data.clear()
+                    # Keep on-disk bodies/ETags; just force revalidation (304s stay cheap)
+                    expire_api_cache()
                     st.success("✅ Cache cleared. Next extraction will fetch fresh data from YouTube.")
             st.info("💡 Clear Cache Before every New attempt / Channel Extraction")
 
             # ── Search ───────────────────────────────────────
             if Search and channel_id:
-                with st.spinner("Searching channel..."):
+                with st.spinner("Searching channel..."), use_reporter(StreamlitReporter()):
                     view_data = get_channel_stats(channel_id)
                 if view_data:
                     st.success("✅ Channel found!")
@@ -956,82 +401,69 @@ if selected == "YDH_DB":
             elif Search:
                 st.warning("⚠️ Please enter a Channel ID to search.")
 
-            # ── Extract ──────────────────────────────────────
-            if Extract and channel_id:
-                extracted_data = extract_channel_all_details(channel_id)
-
-                if extracted_data:
-                    # Save to session state
-                    st.session_state.extracted_data = extracted_data
-                    st.session_state.extracted_channel_id = channel_id
-
-                    channel_name = extracted_data.get("Channel_info", {}).get("Channel_name")
-                    if not channel_name:
-                        st.error("❌ Channel name missing. Cannot store.")
-                        st.stop()
-
-                    channel_info = extracted_data["Channel_info"]
-
-                    # MongoDB saves
-                    mg_yth_db[f"{channel_name}_meta"].delete_many({})
-                    mg_yth_db[f"{channel_name}_meta"].insert_one({
-                        "Channel_Id": channel_info.get("Channel_Id"),
-                        "Channel_name": channel_info.get("Channel_name"),
-                        "Subscribers": channel_info.get("Subscribers"),
-                        "Views": channel_info.get("Views"),
-                        "Total_videos": channel_info.get("Total_videos"),
-                        "Harvested_at": datetime.now().isoformat(),
-                    })
-                    playlist_info = extracted_data.get("playlist_info", [])
-                    mg_yth_db[f"{channel_name}_playlist"].delete_many({})
-                    if playlist_info:
-                        mg_yth_db[f"{channel_name}_playlist"].insert_many(playlist_info)
-
-                    videos = extracted_data.get("Video_info", [])
-                    mg_yth_db[f"{channel_name}_videos"].delete_many({})
-                    if videos:
-                        mg_yth_db[f"{channel_name}_videos"].insert_many(videos)
-
-                    comments = extracted_data.get("Comment_info", [])
-                    mg_yth_db[f"{channel_name}_comments"].delete_many({})
-                    if comments:
-                        mg_yth_db[f"{channel_name}_comments"].insert_many(comments)
-
-                    # Result summary metrics
-                    st.success("✅ Harvest complete and saved to MongoDB!")
-                    r1, r2, r3 = st.columns(3)
-                    r1.metric("📺 Channel", channel_name)
-                    r2.metric("🎞️ Videos Harvested", len(videos),
-                              help="Includes videos outside named playlists")
-                    r3.metric("💬 Comments Harvested", len(comments))
-
-                    # Optional direct storage to PostgreSQL - Basic info
-                    if store_pgsql:
-                        try:
-                            with init_connection() as conn:
-                                store_postgresql_direct(conn, extracted_data)
-                        except Exception as e:
-                            st.error(f"❌ PostgreSQL storage failed: {e}")
-
+            # ── Dry-run estimate ─────────────────────────────
+            if Estimate and channel_id:
+                with st.spinner("Estimating harvest cost..."), use_reporter(StreamlitReporter()):
+                    est_stats = get_channel_stats(channel_id)
+                    est_playlists = get_all_playlists_for_channel(
+                        channel_id, est_stats.get("Channel_name", "Unknown")
+                    ) if est_stats else []
+                if est_stats:
+                    est = estimate_harvest_cost(est_stats, est_playlists)
+                    remaining = get_quota_remaining()
+                    e1, e2, e3 = st.columns(3)
+                    e1.metric("🎞️ Videos · Playlists", f"{est['total_videos']:,} · {est['playlists']:,}")
+                    e2.metric("🔢 Est. Quota", f"{est['units_min']:,} – {est['units_max']:,} units")
+                    e3.metric("⏱️ Est. Duration",
+                              f"{est['seconds_min'] / 60:.1f} – {est['seconds_max'] / 60:.1f} min")
+                    if est["units_min"] > remaining:
+                        st.error(f"🚫 Only {remaining:,} units remain today — not enough for this harvest.")
+                    elif est["units_max"] > remaining:
+                        st.warning(f"⚠️ Only {remaining:,} units remain today — a comment-heavy "
+                                   f"channel may not finish.")
+                    else:
+                        st.success(f"✅ Fits in today's remaining {remaining:,} units.")
+                    st.caption("Full-harvest estimate; an incremental refresh costs far less.")
                 else:
-                    st.error("❌ Extraction failed. Check the Channel ID and try again.", icon="🚨")
+                    st.error("❌ Channel not found. Check the ID and try again.", icon="🚨")
+            elif Estimate:
+                st.warning("⚠️ Please enter a Channel ID to estimate.")
 
+            # ── Extract (background job) ─────────────────────
+            if Extract and channel_id:
+                already_active = job_queue.find_active("extract", channel_id)
+                job_id = job_queue.submit_extract(channel_id, incremental=incremental, store_pgsql=store_pgsql)
+                st.session_state.extract_job_id = job_id
+                if already_active:
+                    st.info("ℹ️ This channel is already being extracted — follow that job below.")
+                else:
+                    st.success("✅ Extraction queued — it keeps running in the background; "
+                               "progress is shown below.")
             elif Extract and not channel_id:
                 st.warning("⚠️ Please enter a Channel ID to extract.")
 
-            #------- JSON download — always visible if data exists in session state ---- #
-            _dl_data = st.session_state.get("extracted_data", {})
-            _dl_channel_id = st.session_state.get("extracted_channel_id", "channel")
-            if _dl_data:
+            st.markdown("##### ⚙️ Extraction Jobs")
+            show_jobs_panel("extract")
+
+            #------- JSON download — available once this session's extraction job succeeded ---- #
+            _dl_job = job_queue.get_job(st.session_state.extract_job_id) \
+                if st.session_state.extract_job_id else None
+            if _dl_job and _dl_job["status"] == JOB_SUCCEEDED:
+                _dl_channel_id = _dl_job["params"]["channel_id"]
                 if export_json:
-                    json_data = json.dumps(_dl_data, indent=2, default=str)
-                    st.download_button(
-                        label="📥 Download Extracted Data as JSON",
-                        data=json_data,
-                        file_name=f"{_dl_channel_id}_youtube_data.json",
-                        mime="application/json",
-                        use_container_width=True,
-                    )
+                    # Built only on request — it reads every document of the channel
+                    if st.button("📦 Prepare JSON Export", key="extract_export", use_container_width=True,
+                                 help="Reads every video, comment and playlist of this channel"):
+                        with st.spinner("Building export..."):
+                            json_data = json.dumps(load_channel_data(mg_yth_db, _dl_channel_id),
+                                                   indent=2, default=str)
+                        st.download_button(
+                            label="📥 Download Extracted Data as JSON",
+                            data=json_data,
+                            file_name=f"{_dl_channel_id}_youtube_data.json",
+                            mime="application/json",
+                            use_container_width=True,
+                        )
                     # st.info("💡 Go to **DB Manager → MongoDB Manager** to view videos, comments and charts.")
                 else:
                     st.caption("💡 Tick the 'Export data as JSON' checkbox above to enable download.")
@@ -1045,12 +477,8 @@ if selected == "YDH_DB":
         st.markdown("### 🗄️ Database Manager")
         st.caption("Manage harvested channel data in MongoDB and migrate it to PostgreSQL.")
 
-        # Shared channel list — used by both sub-tabs
-        all_harvested = [
-            c.replace("_meta", "")
-            for c in mg_yth_db.list_collection_names()
-            if c.endswith("_meta")
-        ]
+        # Shared channel list {channel_id: name} — used by both sub-tabs
+        all_harvested = list_harvested_channels(mg_yth_db)
         if not all_harvested:
             st.info("ℹ️ No harvested channels found in MongoDB. Go to YT Channel Extractor first.")
         else:
@@ -1072,10 +500,12 @@ if selected == "YDH_DB":
 
                     # st.divider()
 
-                    selected_channel_mg = st.selectbox(
-                        "Harvested Channels", all_harvested, key="mg_select",
+                    selected_channel_mg_id = st.selectbox(
+                        "Harvested Channels", list(all_harvested), key="mg_select",
+                        format_func=all_harvested.get,
                         help="Only channels already extracted and saved to MongoDB appear here",
                     )
+                    selected_channel_mg = all_harvested.get(selected_channel_mg_id)
 
                     col1, col2, col3 = st.columns(3)
                     with col1:
@@ -1084,7 +514,7 @@ if selected == "YDH_DB":
                         view_full = st.button("📊 View Full Data", use_container_width=True)
                     with col3:
                         delete_ch = st.button("🗑️ Delete Channel", use_container_width=True,
-                                              help="Permanently removes all collections for this channel from MongoDB")
+                                              help="Permanently removes all data for this channel from MongoDB")
 
                 # ── Channel Basic Info ────────────────────
                 if view_basic and selected_channel_mg:
@@ -1096,10 +526,8 @@ if selected == "YDH_DB":
                             st.markdown(f"### Basic Info — {selected_channel_mg}")
                             st.caption("Channel metadata and collection counts from MongoDB.")
 
-                        doc = mg_yth_db[f"{selected_channel_mg}_meta"].find_one()
-                        if doc:
-                            doc.pop("_id", None)
-
+                        doc = get_channel_summary(mg_yth_db, selected_channel_mg_id)
+                        if doc.get("Channel_name"):
                             # Metadata as metrics
                             m1, m2, m3 = st.columns(3)
                             # m1.metric("📺 Channel", doc.get("Channel_name", ""))
@@ -1110,44 +538,71 @@ if selected == "YDH_DB":
                             st.caption(f"🕒 Harvested at: {doc.get('Harvested_at', '—')}")
                             st.divider()
 
-                            # Collection size summary
+                            # Collection size summary — precomputed at harvest time
                             st.markdown("**MongoDB Collection Counts**")
-                            summary = {}
-                            for suffix in ["_playlist", "_videos", "_comments"]:
-                                col_name = f"{selected_channel_mg}{suffix}"
-                                if col_name in mg_yth_db.list_collection_names():
-                                    summary[suffix.replace("_", "").capitalize()] = mg_yth_db[
-                                        col_name].count_documents({})
-                            if summary:
-                                s_cols = st.columns(len(summary))
-                                for idx, (label, count) in enumerate(summary.items()):
-                                    s_cols[idx].metric(f"📁 {label}", f"{count:,} docs")
+                            s_cols = st.columns(3)
+                            for idx, (label, col_name) in enumerate([("Playlists", PLAYLISTS_COL),
+                                                                     ("Videos", VIDEOS_COL),
+                                                                     ("Comments", COMMENTS_COL)]):
+                                size = doc.get(f"{col_name}_bytes")
+                                s_cols[idx].metric(
+                                    f"📁 {label}", f"{doc.get(col_name, 0):,} docs",
+                                    help=f"{size / 1024 ** 2:,.2f} MB" if size is not None else None,
+                                )
+                            if doc.get("estimated"):
+                                st.caption("≈ Estimated totals across all channels — re-harvest to compute "
+                                           "this channel's summary.")
+                            else:
+                                st.caption(f"👁️ {doc.get('total_views', 0):,} views across stored videos · "
+                                           f"summary updated {doc.get('updated_at', '—')}")
                         else:
                             st.warning("⚠️ No metadata found for this channel.")
                 # ── Full Data View ─────────────────────────
+                # Stays open across reruns (page buttons) until another view is chosen
                 if view_full and selected_channel_mg:
+                    st.session_state.full_view_channel = selected_channel_mg_id
+                    for col_name in (VIDEOS_COL, COMMENTS_COL, PLAYLISTS_COL):
+                        st.session_state[f"mg_{col_name}_pages"] = [None]
+                elif view_basic or delete_ch:
+                    st.session_state.full_view_channel = None
+                if selected_channel_mg and st.session_state.full_view_channel == selected_channel_mg_id:
                     with st.container(border=True):
                         sec_icon, sec_title = st.columns([0.05, 0.95])
                         with sec_icon:
                             st.markdown("### 📊")
                         with sec_title:
                             st.markdown(f"### Full Data — {selected_channel_mg}")
-                            st.caption("Videos, comments and playlists loaded directly from MongoDB.")
-
-                        videos_data = list(mg_yth_db[f"{selected_channel_mg}_videos"].find())
-                        comments_data = list(mg_yth_db[f"{selected_channel_mg}_comments"].find())
-                        playlist_data = list(mg_yth_db[f"{selected_channel_mg}_playlist"].find())
-
-                        videos_df = pd.DataFrame(videos_data).drop(columns=["_id"], errors="ignore")
-                        comments_df = pd.DataFrame(comments_data).drop(columns=["_id"], errors="ignore")
-                        playlist_df = pd.DataFrame(playlist_data).drop(columns=["_id"], errors="ignore")
+                            st.caption("Videos, comments and playlists loaded page by page from MongoDB.")
+
+                        summary = get_channel_summary(mg_yth_db, selected_channel_mg_id)
+                        def total(col_name):
+                            # Estimated summaries count the whole collection, not this channel
+                            return "" if summary.get("estimated") else f" of {summary.get(col_name, 0):,}"
+
+                        def show_pages(col_name, label):
+                            """One page of the channel's `col_name` documents with Prev / Next."""
+                            pages = st.session_state.setdefault(f"mg_{col_name}_pages", [None])
+                            docs, next_after = browse_channel_docs(mg_yth_db, col_name,
+                                                                   selected_channel_mg_id, pages[-1])
+                            if not docs and len(pages) == 1:
+                                st.info(f"No {label} found.")
+                                return
+                            st.dataframe(pd.DataFrame(docs), use_container_width=True)
+                            first_row = (len(pages) - 1) * BROWSE_PAGE_SIZE + 1
+                            prev_col, info_col, next_col = st.columns([1, 4, 1])
+                            info_col.caption(f"Rows {first_row:,}–{first_row + len(docs) - 1:,}"
+                                             f"{total(col_name)} {label}")
+                            if prev_col.button("◀ Prev", key=f"mg_{col_name}_prev", disabled=len(pages) == 1):
+                                pages.pop()
+                                st.rerun()
+                            if next_col.button("Next ▶", key=f"mg_{col_name}_next", disabled=next_after is None):
+                                pages.append(next_after)
+                                st.rerun()
 
-                        # Top 10 chart
-                        if not videos_df.empty and "view_count" in videos_df.columns:
+                        # Top 10 chart — sorted and limited by MongoDB
+                        top10 = pd.DataFrame(top_videos(mg_yth_db, selected_channel_mg_id))
+                        if not top10.empty and "view_count" in top10.columns:
                             st.markdown("#### 📈 Top 10 Videos by Views")
-                            videos_df["view_count"] = pd.to_numeric(videos_df["view_count"],
-                                                                    errors="coerce")
-                            top10 = videos_df.nlargest(10, "view_count")
                             fig = px.bar(
                                 top10, x="view_count", y="video_title", orientation="h",
                                 title=f"Top 10 Videos — {selected_channel_mg}",
@@ -1171,39 +626,34 @@ if selected == "YDH_DB":
                             st.divider()
                         # Videos dataframe
                         st.markdown("#### 🎞️ Videos")
-                        if not videos_df.empty:
-                            st.dataframe(videos_df, use_container_width=True)
-                            st.caption(f"Total: {len(videos_df):,} videos")
-                        else:
-                            st.info("No videos found.")
+                        show_pages(VIDEOS_COL, "videos")
                         st.divider()
 
-                        # Comments dataframe
+                        # Comments dataframe — only queried while the section is open
                         st.markdown("#### 💬 Comments")
-                        if not comments_df.empty:
-                            st.dataframe(comments_df, use_container_width=True)
-                            st.caption(f"Total: {len(comments_df):,} comments")
-                        else:
-                            st.info("No comments found.")
+                        if st.toggle("Show comments", key="mg_show_comments",
+                                     help="Comments are only read from MongoDB while this is on"):
+                            show_pages(COMMENTS_COL, "comments")
                         st.divider()
 
                         # Playlists dataframe
                         st.markdown("#### 📂 Playlists")
-                        if not playlist_df.empty:
-                            st.dataframe(playlist_df, use_container_width=True)
-                            st.caption(f"Total: {len(playlist_df):,} playlists")
-                        else:
-                            st.info("No playlists found.")
+                        show_pages(PLAYLISTS_COL, "playlists")
 
-                        # MongoDB JSON export
+                        # MongoDB JSON export — built only on request
                         st.divider()
-                        if not videos_df.empty:
-                            mongo_json = json.dumps({
-                                "channel": selected_channel_mg,
-                                "videos": videos_df.to_dict(orient="records"),
-                                "comments": comments_df.to_dict(orient="records"),
-                                "playlists": playlist_df.to_dict(orient="records"),
-                            }, indent=2, default=str)
+                        if st.button("📦 Prepare JSON Export", key="mg_export", use_container_width=True,
+                                     help="Reads every video, comment and playlist of this channel"):
+                            with st.spinner("Building export..."):
+                                mongo_json = json.dumps({
+                                    "channel": selected_channel_mg,
+                                    "videos": list(iter_channel_docs(mg_yth_db, VIDEOS_COL,
+                                                                     selected_channel_mg_id)),
+                                    "comments": list(iter_channel_docs(mg_yth_db, COMMENTS_COL,
+                                                                       selected_channel_mg_id)),
+                                    "playlists": list(iter_channel_docs(mg_yth_db, PLAYLISTS_COL,
+                                                                        selected_channel_mg_id)),
+                                }, indent=2, default=str)
                             st.download_button(
                                 label="📥 Download MongoDB Data as JSON",
                                 data=mongo_json,
@@ -1212,22 +662,22 @@ if selected == "YDH_DB":
                                 use_container_width=True,
                             )
                 # ── Delete button ─────────────────────────────────────
-                if delete_ch and selected_channel_mg:
-                    st.session_state.delete_requested = selected_channel_mg
+                if delete_ch and selected_channel_mg_id:
+                    st.session_state.delete_requested = selected_channel_mg_id
                 # ── Delete confirmation ───────────────────────────────
                 if st.session_state.delete_requested:
                     channel_to_delete = st.session_state.delete_requested
+                    name_to_delete = all_harvested.get(channel_to_delete, channel_to_delete)
                     with st.container(border=True):
-                        st.warning(f"⚠️ This will permanently delete all MongoDB data for **{selected_channel_mg}**.")
+                        st.warning(f"⚠️ This will permanently delete all MongoDB data for **{name_to_delete}**.")
                         confirm_c1, confirm_c2, _ = st.columns([1, 1, 2])
                         with confirm_c1:
                             if st.button("✅ Yes, Delete", use_container_width=True, key="confirm_delete"):
-                                for suffix in ["_meta", "_playlist", "_videos", "_comments"]:
-                                    mg_yth_db[f"{selected_channel_mg}{suffix}"].drop()
+                                delete_channel(mg_yth_db, channel_to_delete)
                                 # st.success(f"✅ '{selected_channel_mg}' deleted from MongoDB.")
                                 # Clear session state and rerun
                                 st.session_state.delete_requested = None
-                                st.success(f"✅ '{selected_channel_mg}' deleted from MongoDB.")
+                                st.success(f"✅ '{name_to_delete}' deleted from MongoDB.")
                                 st.rerun()
                         with confirm_c2:
                             if st.button("❌ Cancel", use_container_width=True, key="cancel_delete"):
@@ -1250,21 +700,22 @@ if selected == "YDH_DB":
                         st.markdown("#### Migrate Channel from MongoDB → PostgreSQL")
                         st.caption("Populates channel_table, channel_playlist, channel_videos and channel_comments.")
                     selected_channel_pg = st.selectbox(
-                        "Select a channel to migrate", all_harvested, key="pg_select"
+                        "Select a channel to migrate", list(all_harvested), key="pg_select",
+                        format_func=all_harvested.get,
                     )
+                    pg_summary = get_channel_summary(mg_yth_db, selected_channel_pg)
+                    # Estimated summaries count the whole collection, not this channel
+                    approx = "≈ " if pg_summary.get("estimated") else ""
                     mg_col1, mg_col2, mg_col3 = st.columns(3)
                     with mg_col1:
-                        playlists_count = mg_yth_db[f"{selected_channel_pg}_playlist"].count_documents(
-                            {}) if f"{selected_channel_pg}_playlist" in mg_yth_db.list_collection_names() else 0
-                        st.metric("📂 Playlists in MongoDB", f"{playlists_count:,}")
+                        st.metric("📂 Playlists in MongoDB", f"{approx}{pg_summary.get(PLAYLISTS_COL, 0):,}")
                     with mg_col2:
-                        videos_count = mg_yth_db[f"{selected_channel_pg}_videos"].count_documents(
-                            {}) if f"{selected_channel_pg}_videos" in mg_yth_db.list_collection_names() else 0
-                        st.metric("🎞️ Videos in MongoDB", f"{videos_count:,}")
+                        st.metric("🎞️ Videos in MongoDB", f"{approx}{pg_summary.get(VIDEOS_COL, 0):,}")
                     with mg_col3:
-                        comments_count = mg_yth_db[f"{selected_channel_pg}_comments"].count_documents(
-                            {}) if f"{selected_channel_pg}_comments" in mg_yth_db.list_collection_names() else 0
-                        st.metric("💬 Comments in MongoDB", f"{comments_count:,}")
+                        st.metric("💬 Comments in MongoDB", f"{approx}{pg_summary.get(COMMENTS_COL, 0):,}")
+                    if approx:
+                        st.caption("≈ Estimated totals across all channels — re-harvest to compute "
+                                   "this channel's summary.")
 
                     st.divider()
 
@@ -1283,8 +734,14 @@ if selected == "YDH_DB":
                         )
 
                     if migrate_btn and selected_channel_pg:
-                        with init_connection() as conn:
-                            migrate_to_postgresql(conn, selected_channel_pg, mg_yth_db)
+                        if job_queue.find_active("migrate", selected_channel_pg):
+                            st.info("ℹ️ This channel is already being migrated — follow that job below.")
+                        else:
+                            job_queue.submit_migrate(selected_channel_pg, all_harvested.get(selected_channel_pg))
+                            st.success("✅ Migration queued — it keeps running in the background.")
+
+                    st.markdown("##### ⚙️ Migration Jobs")
+                    show_jobs_panel("migrate")
 
                 # ── Section 2: Direct Store Table ────────────────────
                 with st.container(border=True):
@@ -1293,8 +750,7 @@ if selected == "YDH_DB":
                     st.markdown('<hr style="margin:0.5rem 0; border-color:#333">', unsafe_allow_html=True)
 
                     try:
-                        conn = init_connection()
-                        with conn.cursor() as cur:
+                        with init_connection() as conn, conn.cursor() as cur:
                             cur.execute("""
                                 SELECT channel_name, subscribers, channel_views,
                                        total_videos, harvested_time
@@ -1330,190 +786,195 @@ if selected == "YDH_DB":
     # ──────────────────────────────────────────────
     if selected == "YT Channel Analyzer":
         st.markdown("#### 📊 YouTube Channel Analyzer")
-        st.caption("Run the pre-built SQL queries against your PostgreSQL data warehouse.")
-
-        def run_query(query, columns, index_col=None):
-            """Execute a SQL query and return a styled dataframe."""
-            try:
-                conn = init_connection()
-                with conn.cursor() as cur:
-                    cur.execute(query)
-                    rows = cur.fetchall()
-                df = pd.DataFrame(rows, columns=columns)
-                if index_col and index_col in df.columns:
-                    df = df.set_index(index_col)
-                return df
-            except Exception as e:
-                st.error(f"❌ Query failed: {e}")
-                return pd.DataFrame()
-
-        # Q1
-        with st.expander("Q1 · Names of all videos and their corresponding channels"):
-            df = run_query(
-                """
-                SELECT ch.channel_name, v.video_name
-                FROM channel_videos v
-                JOIN channel_playlist p ON v.playlist_id = p.playlist_id
-                JOIN channel_table   ch ON p.channel_id  = ch.channel_id
-                ORDER BY ch.channel_name
+        st.caption("Run the pre-built SQL queries against your PostgreSQL data warehouse "
+                   "(served from materialized views refreshed after every migration).")
+
+        # ── Query panels ─────────────────────────────────────
+        # A query runs only while its panel is open; all open panels are
+        # queried concurrently on pooled connections.
+        def render_q2(df):
+            fig = px.bar(df, x="Channel Name", y="Video Count", title="Channels by Video Count")
+            st.plotly_chart(fig)
+
+        def render_q3(df):
+            fig = px.bar(df, x="Video Title", y="View Count", color="Channel Name",
+                         title="Top 10 Most Viewed Videos")
+            fig.update_layout(xaxis_tickangle=45)
+            st.plotly_chart(fig)
+
+        def render_q6(df):
+            st.caption("Note: YouTube removed public dislike counts in 2021; dislike_count will be 0.")
+
+        def render_q7(df):
+            fig = px.bar(df, x="Channel Name", y="Total Views", title="Total Views per Channel")
+            st.plotly_chart(fig)
+
+        ANALYZER_PANELS = {
+            "q1": {
+                "title":     "Q1 · Names of all videos and their corresponding channels",
+                "sql": """
+                    SELECT channel_name, video_name, video_id
+                    FROM mv_video_stats
+                    WHERE channel_name IS NOT NULL
                 """,
-                ["Channel Name", "Video Title"],
-                index_col="Channel Name",
-            )
-            if not df.empty:
-                st.dataframe(df, use_container_width=True)
-
-        # Q2
-        with st.expander("Q2 · Channels with the most number of videos"):
-            df = run_query(
-                """
-                SELECT ch.channel_name, ch.total_videos AS video_count
-                FROM channel_table ch
-                ORDER BY ch.total_videos DESC
-                LIMIT 10
+                "columns":   ["Channel Name", "Video Title"],
+                "index_col": "Channel Name",
+                "keyset":    ("channel_name", "video_id"),
+            },
+            "q2": {
+                "title":     "Q2 · Channels with the most number of videos",
+                "sql": """
+                    SELECT ch.channel_name, ch.total_videos AS video_count
+                    FROM channel_table ch
+                    ORDER BY ch.total_videos DESC
+                    LIMIT 10
                 """,
-                ["Channel Name", "Video Count"],
-            )
-            if not df.empty:
-                st.dataframe(df, use_container_width=True)
-                fig = px.bar(df, x="Channel Name", y="Video Count", title="Channels by Video Count")
-                st.plotly_chart(fig)
-
-        # Q3
-        with st.expander("Q3 · Top 10 most viewed videos and their channels"):
-            df = run_query(
-                """
-                SELECT ch.channel_name, v.video_name, v.view_count
-                FROM channel_videos v
-                LEFT JOIN channel_playlist p ON v.playlist_id = p.playlist_id
-                LEFT JOIN channel_table   ch ON p.channel_id  = ch.channel_id
-                ORDER BY v.view_count DESC
-                LIMIT 10
+                "columns":   ["Channel Name", "Video Count"],
+                "render":    render_q2,
+            },
+            "q3": {
+                "title":     "Q3 · Top 10 most viewed videos and their channels",
+                "sql": """
+                    SELECT channel_name, video_name, view_count
+                    FROM mv_video_stats
+                    ORDER BY view_count DESC
+                    LIMIT 10
                 """,
-                ["Channel Name", "Video Title", "View Count"],
-            )
-            if not df.empty:
-                st.dataframe(df, use_container_width=True)
-                fig = px.bar(df, x="Video Title", y="View Count", color="Channel Name",
-                             title="Top 10 Most Viewed Videos")
-                fig.update_layout(xaxis_tickangle=45)
-                st.plotly_chart(fig)
-
-        # Q4
-        with st.expander("Q4 · Number of comments on each video"):
-            df = run_query(
-                """
-                SELECT v.video_name, v.comments_count
-                FROM channel_videos v
-                ORDER BY v.comments_count DESC
+                "columns":   ["Channel Name", "Video Title", "View Count"],
+                "render":    render_q3,
+            },
+            "q4": {
+                "title":     "Q4 · Number of comments on each video",
+                "sql": """
+                    SELECT video_name, comments_count, video_id
+                    FROM mv_video_stats
                 """,
-                ["Video Name", "Comment Count"],
-                index_col="Video Name",
-            )
-            if not df.empty:
-                st.dataframe(df, use_container_width=True)
-
-        # Q5
-        with st.expander("Q5 · Videos with the highest number of likes"):
-            df = run_query(
-                """
-                SELECT ch.channel_name, v.video_name, v.like_count
-                FROM channel_videos v
-                LEFT JOIN channel_playlist p ON v.playlist_id = p.playlist_id
-                LEFT JOIN channel_table   ch ON p.channel_id  = ch.channel_id
-                ORDER BY v.like_count DESC
-                LIMIT 10
+                "columns":   ["Video Name", "Comment Count"],
+                "index_col": "Video Name",
+                "keyset":    ("comments_count", "video_id"),
+                "order":     "DESC",
+            },
+            "q5": {
+                "title":     "Q5 · Videos with the highest number of likes",
+                "sql": """
+                    SELECT channel_name, video_name, like_count
+                    FROM mv_video_stats
+                    ORDER BY like_count DESC
+                    LIMIT 10
                 """,
-                ["Channel Name", "Video Title", "Like Count"],
-            )
-            if not df.empty:
-                st.dataframe(df, use_container_width=True)
-
-        # Q6
-        with st.expander("Q6 · Total likes and dislikes for each video"):
-            df = run_query(
-                """
-                SELECT video_name, like_count, dislike_count
-                FROM channel_videos
-                ORDER BY like_count DESC
+                "columns":   ["Channel Name", "Video Title", "Like Count"],
+            },
+            "q6": {
+                "title":     "Q6 · Total likes and dislikes for each video",
+                "sql": """
+                    SELECT video_name, like_count, dislike_count, video_id
+                    FROM mv_video_stats
                 """,
-                ["Video Name", "Like Count", "Dislike Count"],
-                index_col="Video Name",
-            )
-            if not df.empty:
-                st.dataframe(df, use_container_width=True)
-                st.caption("Note: YouTube removed public dislike counts in 2021; dislike_count will be 0.")
-
-        # Q7
-        with st.expander("Q7 · Total views for each channel"):
-            df = run_query(
-                """
-                SELECT channel_name, channel_views AS total_views
-                FROM channel_table
-                ORDER BY total_views DESC
+                "columns":   ["Video Name", "Like Count", "Dislike Count"],
+                "index_col": "Video Name",
+                "keyset":    ("like_count", "video_id"),
+                "order":     "DESC",
+                "render":    render_q6,
+            },
+            "q7": {
+                "title":     "Q7 · Total views for each channel",
+                "sql": """
+                    SELECT channel_name, channel_views AS total_views
+                    FROM channel_table
+                    ORDER BY total_views DESC
                 """,
-                ["Channel Name", "Total Views"],
-            )
-            if not df.empty:
-                st.dataframe(df, use_container_width=True)
-                fig = px.bar(df, x="Channel Name", y="Total Views", title="Total Views per Channel")
-                st.plotly_chart(fig)
-
-        # Q8
-        with st.expander("Q8 · Channels that published videos in 2022"):
-            df = run_query(
-                """
-                SELECT DISTINCT ch.channel_name,
-                       COUNT(v.video_id)  AS videos_in_2022,
-                       SUM(v.view_count)  AS total_views
-                FROM channel_videos v
-                LEFT JOIN channel_playlist p ON v.playlist_id = p.playlist_id
-                LEFT JOIN channel_table   ch ON p.channel_id  = ch.channel_id
-                WHERE EXTRACT(YEAR FROM v.published_date) = 2022
-                GROUP BY ch.channel_name
-                ORDER BY videos_in_2022 DESC
+                "columns":   ["Channel Name", "Total Views"],
+                "render":    render_q7,
+            },
+            "q8": {
+                "title":     "Q8 · Channels that published videos in 2022",
+                "sql": """
+                    SELECT channel_name, videos AS videos_in_2022, total_views
+                    FROM mv_channel_year_stats
+                    WHERE year = 2022
+                    ORDER BY videos DESC
                 """,
-                ["Channel Name", "Videos in 2022", "Total Views"],
-                index_col="Channel Name",
-            )
-            if not df.empty:
-                st.dataframe(df, use_container_width=True)
-            else:
-                st.info("No videos published in 2022 found in the warehouse.")
-
-        # Q9
-        with st.expander("Q9 · Average duration of videos per channel"):
-            df = run_query(
-                """
-                SELECT ch.channel_name,
-                       TO_CHAR(AVG(v.duration::interval), 'HH24:MI:SS') AS avg_duration
-                FROM channel_videos v
-                LEFT JOIN channel_playlist p ON v.playlist_id = p.playlist_id
-                LEFT JOIN channel_table   ch ON p.channel_id  = ch.channel_id
-                GROUP BY ch.channel_name
-                ORDER BY ch.channel_name
+                "columns":   ["Channel Name", "Videos in 2022", "Total Views"],
+                "index_col": "Channel Name",
+                "empty":     "No videos published in 2022 found in the warehouse.",
+            },
+            "q9": {
+                "title":     "Q9 · Average duration of videos per channel",
+                "sql": """
+                    SELECT channel_name, avg_duration
+                    FROM mv_channel_durations
+                    ORDER BY channel_name
                 """,
-                ["Channel Name", "Avg Duration (HH:MM:SS)"],
-                index_col="Channel Name",
-            )
-            if not df.empty:
-                st.dataframe(df, use_container_width=True)
-
-        # Q10
-        with st.expander("Q10 · Videos with the highest number of comments"):
-            df = run_query(
-                """
-                SELECT ch.channel_name, v.video_name, v.comments_count
-                FROM channel_videos v
-                LEFT JOIN channel_playlist p ON v.playlist_id = p.playlist_id
-                LEFT JOIN channel_table   ch ON p.channel_id  = ch.channel_id
-                ORDER BY v.comments_count DESC
-                LIMIT 10
+                "columns":   ["Channel Name", "Avg Duration (HH:MM:SS)"],
+                "index_col": "Channel Name",
+            },
+            "q10": {
+                "title":     "Q10 · Videos with the highest number of comments",
+                "sql": """
+                    SELECT channel_name, video_name, comments_count
+                    FROM mv_video_stats
+                    ORDER BY comments_count DESC
+                    LIMIT 10
                 """,
-                ["Channel Name", "Video Title", "Comment Count"],
-            )
-            if not df.empty:
-                st.dataframe(df, use_container_width=True)
+                "columns":   ["Channel Name", "Video Title", "Comment Count"],
+            },
+        }
+
+        # Unbounded queries (those with a "keyset") are paged: each open panel
+        # keeps the stack of page-start keys it has walked through.
+        def page_stack(key):
+            return st.session_state.setdefault(f"analyzer_{key}_pages", [None])
+
+        # Panel headers first, so we know which queries are needed this run
+        panel_boxes = {}
+        for key, panel in ANALYZER_PANELS.items():
+            box = st.container(border=True)
+            if box.toggle(panel["title"], key=f"analyzer_{key}"):
+                panel_boxes[key] = box
+
+        if panel_boxes:
+            queries = {}
+            for key in panel_boxes:
+                queries[key] = ANALYZER_PANELS[key]
+                if "keyset" in queries[key]:
+                    queries[key] = {**queries[key], "after": page_stack(key)[-1]}
+            try:
+                pg_pool = get_pg_pool(dict(st.secrets["postgres"]))
+                results = run_queries(pg_pool, queries, cache=get_query_cache())
+            except Exception as e:
+                st.error(f"❌ Could not reach PostgreSQL: {e}")
+                results = {}
+            for key, (df, seconds, error, cached) in results.items():
+                panel = ANALYZER_PANELS[key]
+                with panel_boxes[key]:
+                    if error is not None:
+                        st.error(f"❌ Query failed: {error}")
+                    elif df.empty:
+                        st.info(panel.get("empty", "No rows returned."))
+                    else:
+                        st.dataframe(df, use_container_width=True)
+                        if panel.get("render"):
+                            panel["render"](df)
+                    if error is None and "keyset" in panel and (len(page_stack(key)) > 1 or not df.empty):
+                        pages = page_stack(key)
+                        first_row = (len(pages) - 1) * ANALYZER_PAGE_SIZE + 1
+                        prev_col, info_col, next_col = st.columns([1, 4, 1])
+                        info_col.caption(f"Page {len(pages)} · rows {first_row:,}–{first_row + len(df) - 1:,}")
+                        if prev_col.button("◀ Prev", key=f"analyzer_{key}_prev", disabled=len(pages) == 1):
+                            pages.pop()
+                            st.rerun()
+                        next_after = df.attrs.get("next_after")
+                        if next_col.button("Next ▶", key=f"analyzer_{key}_next", disabled=next_after is None):
+                            pages.append(next_after)
+                            st.rerun()
+                    st.caption(f"⏱️ {seconds * 1000:,.0f} ms" + (" · ⚡ cached" if cached else ""))
+        else:
+            st.caption("Open a panel to run its query.")
+
+        cache_stats = get_query_cache().stats()
+        st.caption(f"🗃️ Result cache: {cache_stats['hit_rate']:.0%} hit rate "
+                   f"({cache_stats['hits']:,} hits / {cache_stats['misses']:,} misses) · "
+                   f"{cache_stats['entries']:,} entries · {cache_stats['bytes'] / 1024 ** 2:,.1f} MB")
 
 # ==============================
 # CONTACT
@@ -0,0 +1,167 @@
+# ----- Import Basic Packages ----- #
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from postgres_db import get_warehouse_version
+
+# ============================================================
+# Analyzer Query Runner
+# Runs the YT Channel Analyzer queries on connections borrowed from a
+# PostgresPool. Only the panels a user has opened are queried, and those
+# run concurrently — each on its own pooled connection — with their
+# latency measured.
+# ============================================================
+QUERY_CACHE_MAX_BYTES = 256 * 1024 ** 2   # DataFrame memory kept across all sessions
+WAREHOUSE_VERSION_TTL = 5                 # seconds a looked-up warehouse version is trusted
+ANALYZER_PAGE_SIZE = 100                  # rows per page of an unbounded (keyset-paged) query
+
+class QueryCache:
+    """
+    Process-wide LRU cache of query results, shared by all sessions. Entries
+    are keyed on the SQL text plus the warehouse data version, which the
+    migration / direct-store write paths bump — so results are served until
+    the next write, then naturally miss and age out.
+    """
+
+    def __init__(self, max_bytes=QUERY_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()     # key → (DataFrame, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._version = (None, 0.0)       # (version, looked up at)
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, pg_pool):
+        with self._lock:
+            version, looked_up = self._version
+        if version is None or time.monotonic() - looked_up > WAREHOUSE_VERSION_TTL:
+            with pg_pool.connection() as conn:
+                version = get_warehouse_version(conn)
+            with self._lock:
+                self._version = (version, time.monotonic())
+        return version
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, df):
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (df, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits":     self.hits,
+                "misses":   self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries":  len(self._entries),
+                "bytes":    self._bytes,
+            }
+
+def run_query(pg_pool, query, columns, index_col=None):
+    """Execute one query; returns (DataFrame, seconds)."""
+    started = time.perf_counter()
+    with pg_pool.connection() as conn, conn.cursor() as cur:
+        cur.execute(query)
+        rows = cur.fetchall()
+    df = pd.DataFrame(rows, columns=columns)
+    if index_col and index_col in df.columns:
+        df = df.set_index(index_col)
+    return df, time.perf_counter() - started
+
+def run_page(pg_pool, spec, after=None, page_size=ANALYZER_PAGE_SIZE):
+    """
+    Fetch one page of a keyset-paged query; returns (DataFrame, seconds).
+    spec["sql"] selects the displayed columns followed by any keyset columns
+    not among them; spec["keyset"] names the unique ordering columns, all
+    sorted in spec["order"]. The page starts after the key tuple `after`
+    (None for the first page) and df.attrs["next_after"] holds the key to
+    pass for the next page, or None on the last one.
+
+    The query runs through a named (server-side) cursor, so PostgreSQL plans
+    it for a fast first page and only page_size + 1 rows ever leave the server.
+    """
+    keyset, order = spec["keyset"], spec.get("order", "ASC")
+    comparison = ">" if order == "ASC" else "<"
+    keys = ", ".join(keyset)
+    query = f"SELECT * FROM ({spec['sql']}) AS page"
+    if after is not None:
+        query += f" WHERE ({keys}) {comparison} ({', '.join(['%s'] * len(keyset))})"
+    query += " ORDER BY " + ", ".join(f"{k} {order}" for k in keyset)
+
+    started = time.perf_counter()
+    with pg_pool.connection() as conn:
+        with conn.cursor(name="ydh_analyzer_page") as cur:
+            cur.itersize = page_size + 1
+            cur.execute(query, after)
+            rows = cur.fetchmany(page_size + 1)
+            names = [d[0] for d in cur.description]
+        conn.rollback()       # end the cursor's transaction
+
+    next_after = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_after = tuple(rows[-1][names.index(k)] for k in keyset)
+    columns = spec["columns"]
+    df = pd.DataFrame([row[:len(columns)] for row in rows], columns=columns)
+    if spec.get("index_col") in df.columns:
+        df = df.set_index(spec["index_col"])
+    df.attrs["next_after"] = next_after
+    return df, time.perf_counter() - started
+
+def run_queries(pg_pool, queries, cache=None):
+    """
+    Run {key: {"sql", "columns", "index_col"}} concurrently, at most one per
+    pooled connection, serving results from `cache` (a QueryCache) when the
+    warehouse hasn't changed. Specs with a "keyset" fetch only the page after
+    spec["after"] (see run_page). Returns
+    {key: (DataFrame or None, seconds, error or None, cached)}.
+    """
+    def run(spec):
+        started = time.perf_counter()
+        after = spec.get("after")
+        cache_key = (spec["sql"], tuple(spec["columns"]), spec.get("index_col"), after, version)
+        if cache is not None:
+            df = cache.get(cache_key)
+            if df is not None:
+                return df, time.perf_counter() - started, None, True
+        try:
+            if spec.get("keyset"):
+                df, seconds = run_page(pg_pool, spec, after)
+            else:
+                df, seconds = run_query(pg_pool, spec["sql"], spec["columns"], spec.get("index_col"))
+        except Exception as e:
+            return None, time.perf_counter() - started, e, False
+        if cache is not None:
+            cache.put(cache_key, df)
+        return df, seconds, None, False
+
+    if not queries:
+        return {}
+    version = cache.version(pg_pool) if cache is not None else None
+    workers = max(1, min(len(queries), pg_pool.maxconn))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ydh-query") as pool:
+        futures = {key: pool.submit(run, spec) for key, spec in queries.items()}
+        return {key: future.result() for key, future in futures.items()}
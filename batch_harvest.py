@@ -0,0 +1,137 @@
+# ----- Import Basic Packages ----- #
+import re
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# --------- Import Packages for DB --------- #
+from pymongo import MongoClient
+
+# ------ Import the shared harvesting / warehouse core ------ #
+from reporter import Reporter, use_reporter, submit_in_context
+from harvest import (
+    SECRETS_PATH, MONGO_DB_NAME, load_secrets, configure_api_keys,
+    extract_channel_all_details, get_quota_remaining,
+)
+from postgres_db import (
+    PG_LOAD_ENGINE, PG_LOAD_ENGINES, MIGRATE_CHUNK, get_pg_pool, store_postgresql_direct, migrate_to_postgresql,
+)
+
+# ============================================================
+# Headless Batch Harvester
+# Runs the same harvest pipeline as the Streamlit "Extract & Save to MongoDB"
+# button for many channels at once — meant for cron / nightly refreshes.
+#
+#   python batch_harvest.py channels.txt --workers 4 --incremental --postgres migrate
+# ============================================================
+CHANNEL_ID_PATTERN = re.compile(r"UC[a-zA-Z0-9_-]{22}")
+
+def read_channel_ids(path):
+    """
+    Read channel IDs from a text file — one per line, '#' comments allowed.
+    Lines like 'Channel name = UC...' (as in Problem Statement/) also work;
+    anything without a channel ID is ignored. Duplicates are dropped.
+    """
+    channel_ids = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0]
+            match = CHANNEL_ID_PATTERN.search(line)
+            if match and match.group(0) not in channel_ids:
+                channel_ids.append(match.group(0))
+    return channel_ids
+
+
+def harvest_channel(channel_id, mg_db, incremental=False, postgres=None, pg_settings=None, verbose=False,
+                    load_engine=None, migrate_chunk=MIGRATE_CHUNK):
+    """Harvest one channel into MongoDB (and optionally PostgreSQL); return a result row."""
+    reporter = Reporter(prefix=channel_id, verbose=verbose)
+    started = time.perf_counter()
+    result = {"channel_id": channel_id, "status": "failed", "videos": 0, "comments": 0}
+    try:
+        with use_reporter(reporter):
+            data = extract_channel_all_details(channel_id, mg_db, incremental=incremental)
+            if data:
+                channel_name = data["Channel_info"].get("Channel_name")
+                result.update(
+                    status="success",
+                    channel_name=channel_name,
+                    videos=data["Meta"]["Total_Videos"],
+                    comments=data["Meta"]["Total_Comments"],
+                )
+                if postgres:
+                    with get_pg_pool(pg_settings).connection() as conn:
+                        if postgres == "direct":
+                            store_postgresql_direct(conn, data)
+                        elif not migrate_to_postgresql(conn, channel_id, mg_db, engine=load_engine,
+                                                       chunk_size=migrate_chunk):
+                            result["status"] = "postgres_failed"
+    except Exception as e:
+        reporter.error(f"❌ Harvest failed: {e}")
+    result["quota"] = reporter.quota_used
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Harvest many YouTube channels without the Streamlit UI.")
+    parser.add_argument("channels_file", help="text file with one channel ID per line")
+    parser.add_argument("--workers", type=int, default=4, help="channels harvested in parallel (default 4)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only fetch new uploads / changed comments for channels already in MongoDB")
+    parser.add_argument("--postgres", choices=["direct", "migrate"],
+                        help="also store basic info ('direct') or migrate the full channel ('migrate')")
+    parser.add_argument("--load-engine", choices=PG_LOAD_ENGINES, default=PG_LOAD_ENGINE,
+                        help=f"bulk loader for --postgres migrate (default {PG_LOAD_ENGINE})")
+    parser.add_argument("--migrate-chunk", type=int, default=MIGRATE_CHUNK,
+                        help=f"rows per committed chunk for --postgres migrate (default {MIGRATE_CHUNK})")
+    parser.add_argument("--secrets", default=SECRETS_PATH, help=f"secrets.toml path (default {SECRETS_PATH})")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print per-step progress")
+    args = parser.parse_args(argv)
+
+    secrets = load_secrets(args.secrets)
+    configure_api_keys(secrets["youtube1"]["api_keys"], secrets["youtube2"]["api_keys"])
+    mg_db = MongoClient(secrets["mongodb"]["connection_url"], serverSelectionTimeoutMS=3000)[MONGO_DB_NAME]
+    pg_settings = secrets.get("postgres") if args.postgres else None
+
+    channel_ids = read_channel_ids(args.channels_file)
+    if not channel_ids:
+        print(f"No channel IDs found in {args.channels_file}", file=sys.stderr)
+        return 1
+    print(f"Harvesting {len(channel_ids)} channel(s) with {args.workers} worker(s) — "
+          f"{get_quota_remaining():,} quota units left today.", file=sys.stderr)
+
+    started = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = [
+            submit_in_context(pool, harvest_channel, cid, mg_db, args.incremental,
+                              args.postgres, pg_settings, args.verbose, args.load_engine,
+                              args.migrate_chunk)
+            for cid in channel_ids
+        ]
+        for future in as_completed(futures):
+            r = future.result()
+            results.append(r)
+            print(f"{len(results):>4}/{len(channel_ids)}  {r['status']:<15} {r['channel_id']}  "
+                  f"{r['videos']:>6,} videos  {r['comments']:>8,} comments  "
+                  f"{r['quota']:>6,} units  {r['seconds']:7.1f}s", file=sys.stderr)
+
+    # ── Throughput report ──
+    elapsed = time.perf_counter() - started
+    ok = [r for r in results if r["status"] == "success"]
+    videos = sum(r["videos"] for r in results)
+    comments = sum(r["comments"] for r in results)
+    units = sum(r["quota"] for r in results)
+    print("\n── Batch harvest summary ──")
+    print(f"Channels   : {len(ok)}/{len(results)} succeeded")
+    print(f"Videos     : {videos:,}  ({videos / max(elapsed, 1e-9):,.1f}/s)")
+    print(f"Comments   : {comments:,}  ({comments / max(elapsed, 1e-9):,.1f}/s)")
+    print(f"Quota used : {units:,} units  ({get_quota_remaining():,} left today)")
+    print(f"Elapsed    : {elapsed:,.1f}s  ({len(results) / max(elapsed / 60, 1e-9):,.2f} channels/min)")
+    return 0 if len(ok) == len(results) else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
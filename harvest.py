@@ -0,0 +1,1378 @@
+# ----- Import Basic Packages ----- #
+import json
+import re
+import os
+import time
+import math
+import sqlite3
+import hashlib
+import threading
+import tomllib
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from itertools import cycle
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# ------ Import Package for Google API ------ #
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+# --------- Import Packages for DB --------- #
+from pymongo import UpdateOne
+
+from reporter import get_reporter, submit_in_context
+
+# ============================================================
+# Harvesting Core
+# YouTube API access (key rotation, batching, ETag cache, quota ledger) and
+# the channel harvest pipeline. Nothing here imports Streamlit: the UI in
+# YDH.py, batch_harvest.py and background jobs all call into this module and
+# receive messages / progress through reporter.get_reporter().
+# ============================================================
+
+# ---- Secrets ---- same file Streamlit reads for st.secrets #
+SECRETS_PATH = os.path.join(".streamlit", "secrets.toml")
+
+# ---- MongoDB database holding the harvested channels ---- #
+MONGO_DB_NAME = "YouTubeHarvest"
+MONGO_WRITE_BATCH = 1000   # documents per bulk write while streaming a harvest
+# One collection per entity for all channels, every document keyed by channel_id
+CHANNELS_COL  = "channels"
+PLAYLISTS_COL = "playlists"
+VIDEOS_COL    = "videos"
+COMMENTS_COL  = "comments"
+SUMMARY_COL   = "channel_summaries"   # one precomputed stats document per channel
+
+def load_secrets(path=SECRETS_PATH):
+    """Read secrets.toml outside Streamlit (CLI / cron)."""
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+# ---------- Complete YouTube API Management --------------- #
+# ---- API Keys ---- set by configure_api_keys() from secrets.toml #
+YOUTUBE_API_KEYS_P1 = []  # Project 1 — 10,000 quota
+YOUTUBE_API_KEYS_P2 = []  # Project 2 — 10,000 quota
+YOUTUBE_API_KEYS = []
+# Cycle through the interleaved keys
+api_key_cycle = cycle(YOUTUBE_API_KEYS)
+# Guards api_key_cycle when API calls run on worker threads
+api_key_lock = threading.Lock()
+
+def configure_api_keys(keys_p1, keys_p2):
+    """Install the two projects' API keys, interleaved so rotation alternates projects.
+    Safe to call on every Streamlit rerun — the rotation is kept if keys are unchanged.
+    """
+    global YOUTUBE_API_KEYS_P1, YOUTUBE_API_KEYS_P2, YOUTUBE_API_KEYS, api_key_cycle
+    keys_p1, keys_p2 = list(keys_p1), list(keys_p2)
+    with api_key_lock:
+        if keys_p1 == YOUTUBE_API_KEYS_P1 and keys_p2 == YOUTUBE_API_KEYS_P2:
+            return
+        YOUTUBE_API_KEYS_P1 = keys_p1
+        YOUTUBE_API_KEYS_P2 = keys_p2
+        YOUTUBE_API_KEYS = [
+            key for pair in zip(keys_p1, keys_p2)
+            for key in pair
+        ]
+        api_key_cycle = cycle(YOUTUBE_API_KEYS)
+
+# ---- Worker pool size for concurrent comment fetching ---- #
+COMMENT_FETCH_WORKERS = 8
+# ---- Max calls per Google batch HTTP request (API limit is 50) ---- #
+BATCH_MAX_CALLS = 50
+
+# ---- On-disk caches live next to this module, whatever the working directory ---- #
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+# ---- On-disk ETag response cache (survives restarts and cache clears) ---- #
+API_CACHE_PATH = os.path.join(CACHE_DIR, "youtube_api_cache.sqlite3")
+API_CACHE_TTL = 3600                       # seconds channel / playlist metadata is served without revalidating
+API_CACHE_MAX_BYTES = 256 * 1024 * 1024    # LRU-evict beyond this total body size
+API_CACHE_EVICT_EVERY = 200                # writes between eviction checks
+
+# ---- Persistent per-key quota ledger (per Pacific-time day) ---- #
+QUOTA_LEDGER_PATH = os.path.join(CACHE_DIR, "quota_ledger.sqlite3")
+PROJECT_DAILY_QUOTA = 10000                # each Google Cloud project gets 10,000 units/day
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")   # YouTube quota resets at Pacific midnight
+API_ROUND_TRIP_SECONDS = 0.35              # rough latency of one HTTP round trip, for estimates
+
+# ---- Quota per endpoint (approx. official) ---- #
+API_COST_MAP = {
+    "channels().list": 1,
+    "search().list": 100,
+    "videos().list": 1,
+    "commentThreads().list": 1,
+    "playlistItems().list": 1,
+    "playlists().list": 1,
+}
+
+# ---- Build API Key Service with Given Key ---- #
+# httplib2 (used by googleapiclient) is not thread-safe, so every thread
+# keeps its own service object per key instead of sharing one.
+_thread_services = threading.local()
+
+def get_youtube_api(api_key):
+    services = getattr(_thread_services, "services", None)
+    if services is None:
+        services = _thread_services.services = {}
+    if api_key not in services:
+        services[api_key] = build("youtube", "v3", developerKey=api_key)
+    return services[api_key]
+
+# ---- Get API Key and build service - Rotation Helper ---- #
+def get_next_youtube_service():
+    """Cycles through API keys and returns (key, service).
+    Keys whose project the quota ledger knows is exhausted today are skipped.
+    """
+    try:
+        for _ in range(len(YOUTUBE_API_KEYS)):
+            with api_key_lock:
+                api_key = next(api_key_cycle)
+            if is_key_exhausted(api_key):
+                continue
+            youtube_service = get_youtube_api(api_key)
+            return api_key, youtube_service
+        return None, None
+    except Exception as e:
+        get_reporter().error(f"❌ Failed to create YouTube service: {e}")
+        return None, None
+
+# ---- Quota Increment Helper ---- #
+def increment_quota(cost_key, api_key=None):
+    cost = API_COST_MAP.get(cost_key, 1)
+    get_reporter().quota(cost)
+    if api_key:
+        record_quota(api_key, cost)
+
+# ============================================================
+# Persistent quota ledger (SQLite)
+# Units spent per API key per Pacific-time day, shared by every session and
+# process. Quota is enforced per Google Cloud project, so exhaustion is
+# tracked per project and all of its keys are skipped together.
+# ============================================================
+QUOTA_LEDGER_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS quota_ledger (
+        day        TEXT NOT NULL,
+        key_id     TEXT NOT NULL,
+        project    INTEGER NOT NULL,
+        units      INTEGER NOT NULL DEFAULT 0,
+        exhausted  INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, key_id)
+    );
+"""
+
+_thread_sqlite = threading.local()
+
+def get_thread_sqlite(path, schema):
+    """Per-thread SQLite connection (WAL mode), creating the schema on first use."""
+    conns = getattr(_thread_sqlite, "conns", None)
+    if conns is None:
+        conns = _thread_sqlite.conns = {}
+    if path not in conns:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        db = sqlite3.connect(path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(schema)
+        db.commit()
+        conns[path] = db
+    return conns[path]
+
+def quota_day():
+    """Current quota day (YYYY-MM-DD in Pacific time)."""
+    return datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+def key_fingerprint(api_key):
+    """Short stable ID for a key, so raw keys never land on disk."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+def key_project(api_key):
+    return 1 if api_key in YOUTUBE_API_KEYS_P1 else 2
+
+def record_quota(api_key, units):
+    try:
+        db = get_thread_sqlite(QUOTA_LEDGER_PATH, QUOTA_LEDGER_SCHEMA)
+        db.execute("""
+            INSERT INTO quota_ledger (day, key_id, project, units) VALUES (?, ?, ?, ?)
+            ON CONFLICT (day, key_id) DO UPDATE SET units = units + excluded.units
+        """, (quota_day(), key_fingerprint(api_key), key_project(api_key), units))
+        db.commit()
+    except sqlite3.Error:
+        pass
+
+def mark_key_exhausted(api_key):
+    """Record that a key's project answered quotaExceeded today."""
+    try:
+        db = get_thread_sqlite(QUOTA_LEDGER_PATH, QUOTA_LEDGER_SCHEMA)
+        db.execute("""
+            INSERT INTO quota_ledger (day, key_id, project, exhausted) VALUES (?, ?, ?, 1)
+            ON CONFLICT (day, key_id) DO UPDATE SET exhausted = 1
+        """, (quota_day(), key_fingerprint(api_key), key_project(api_key)))
+        db.commit()
+    except sqlite3.Error:
+        pass
+
+def get_quota_ledger(day=None):
+    """Return {project: {"units": int, "exhausted": bool}} for a quota day."""
+    ledger = {1: {"units": 0, "exhausted": False}, 2: {"units": 0, "exhausted": False}}
+    try:
+        db = get_thread_sqlite(QUOTA_LEDGER_PATH, QUOTA_LEDGER_SCHEMA)
+        for project, units, exhausted in db.execute("""
+            SELECT project, SUM(units), MAX(exhausted) FROM quota_ledger
+            WHERE day = ? GROUP BY project
+        """, (day or quota_day(),)):
+            ledger[project] = {"units": units or 0, "exhausted": bool(exhausted)}
+    except sqlite3.Error:
+        pass
+    return ledger
+
+def is_key_exhausted(api_key):
+    project = get_quota_ledger()[key_project(api_key)]
+    return project["exhausted"] or project["units"] >= PROJECT_DAILY_QUOTA
+
+def get_quota_remaining():
+    """Units left today across both projects, according to the ledger."""
+    return sum(
+        0 if p["exhausted"] else max(0, PROJECT_DAILY_QUOTA - p["units"])
+        for p in get_quota_ledger().values()
+    )
+
+# ---- Quota error detector ---- #
+def is_quota_error(e):
+    """Return True if an HttpError was raised because the key ran out of quota."""
+    error_reason = ""
+    try:
+        error_reason = e.error_details[0]["reason"]
+    except Exception:
+        pass
+    return "quotaExceeded" in str(e) or error_reason == "quotaExceeded"
+
+# ---- Pre-Wrapped Helper: Quota Tracking and Error Handling ---- #
+def safe_api_call(service_function, cost_key=None):
+    """Wrap a YouTube API call with key rotation, quota tracking, and error handling.
+    service_function must accept a youtube service object and return the response:
+        lambda yt: yt.channels().list(...).execute()
+    """
+    for _ in range(len(YOUTUBE_API_KEYS)):
+        api_key, youtube_api = get_next_youtube_service()
+        if not youtube_api:
+            continue
+        try:
+            response = service_function(youtube_api)
+            increment_quota(cost_key, api_key)
+            return response
+        except HttpError as e:
+            if is_quota_error(e):
+                mark_key_exhausted(api_key)
+                get_reporter().warning(f"🔁 Quota exceeded for key `{key_fingerprint(api_key)}`. Trying next key...")
+                continue
+            else:
+                # 403 on commentThreads is expected — don't alarm the user
+                if e.resp.status not in [403, 400]:
+                    get_reporter().error(f"❌ API Error: {e}")
+                return None
+
+    get_reporter().error("🚫 All API keys exhausted or failed.")
+    return None
+
+# ============================================================
+# Persistent ETag-aware API response cache (SQLite)
+# Keyed by API method + request parameters (API key stripped), it stores the
+# response body and its ETag. Entries younger than API_CACHE_TTL are served
+# without a request; older ones are revalidated with If-None-Match, and a 304
+# reply serves the stored body. Harvest calls (playlistItems, videos,
+# commentThreads) pass revalidate=True and always revalidate, so new uploads
+# and changed counts are never missed; only channel / playlist metadata is
+# served from the TTL.
+# ============================================================
+_cache_write_lock = threading.Lock()
+_cache_writes = 0
+NOT_MODIFIED = object()   # sentinel returned by a conditional request on 304
+
+API_CACHE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS api_cache (
+        cache_key   TEXT PRIMARY KEY,
+        etag        TEXT,
+        body        TEXT NOT NULL,
+        size        INTEGER NOT NULL,
+        stored_at   REAL NOT NULL,
+        last_access REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_api_cache_lru ON api_cache (last_access);
+"""
+
+def get_api_cache_db():
+    """Per-thread SQLite connection to the on-disk response cache."""
+    return get_thread_sqlite(API_CACHE_PATH, API_CACHE_SCHEMA)
+
+def api_cache_key(request):
+    """Build a cache key from an unexecuted request: method id + sorted params without the API key."""
+    parts = urlsplit(request.uri)
+    params = sorted((k, v) for k, v in parse_qsl(parts.query) if k != "key")
+    return f"{request.methodId}?{urlencode(params)}"
+
+def api_cache_get(cache_key):
+    """Return {'etag', 'body', 'fresh'} for a cached response, or None."""
+    try:
+        db = get_api_cache_db()
+        row = db.execute(
+            "SELECT etag, body, stored_at FROM api_cache WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+        if not row:
+            return None
+        db.execute("UPDATE api_cache SET last_access = ? WHERE cache_key = ?", (time.time(), cache_key))
+        db.commit()
+        return {
+            "etag":  row[0],
+            "body":  json.loads(row[1]),
+            "fresh": time.time() - row[2] < API_CACHE_TTL,
+        }
+    except sqlite3.Error:
+        return None
+
+def api_cache_put(cache_key, response):
+    """Store (or refresh) a response body and its ETag, evicting LRU entries when over budget."""
+    global _cache_writes
+    try:
+        body = json.dumps(response)
+        now = time.time()
+        db = get_api_cache_db()
+        db.execute("""
+            INSERT INTO api_cache (cache_key, etag, body, size, stored_at, last_access)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (cache_key) DO UPDATE SET
+                etag = excluded.etag, body = excluded.body, size = excluded.size,
+                stored_at = excluded.stored_at, last_access = excluded.last_access
+        """, (cache_key, response.get("etag"), body, len(body), now, now))
+        db.commit()
+        with _cache_write_lock:
+            _cache_writes += 1
+            evict = _cache_writes % API_CACHE_EVICT_EVERY == 0
+        if evict:
+            evict_api_cache()
+    except sqlite3.Error:
+        pass
+
+def api_cache_revalidated(cache_key):
+    """Mark an entry fresh again after a 304 Not Modified."""
+    try:
+        db = get_api_cache_db()
+        now = time.time()
+        db.execute("UPDATE api_cache SET stored_at = ?, last_access = ? WHERE cache_key = ?",
+                   (now, now, cache_key))
+        db.commit()
+    except sqlite3.Error:
+        pass
+
+def evict_api_cache():
+    """Drop least-recently-used entries until the cache fits API_CACHE_MAX_BYTES."""
+    db = get_api_cache_db()
+    total = db.execute("SELECT COALESCE(SUM(size), 0) FROM api_cache").fetchone()[0]
+    if total <= API_CACHE_MAX_BYTES:
+        return
+    excess = total - API_CACHE_MAX_BYTES
+    freed = 0
+    doomed = []
+    for cache_key, size in db.execute("SELECT cache_key, size FROM api_cache ORDER BY last_access ASC"):
+        doomed.append((cache_key,))
+        freed += size
+        if freed >= excess:
+            break
+    db.executemany("DELETE FROM api_cache WHERE cache_key = ?", doomed)
+    db.commit()
+
+def expire_api_cache():
+    """Force every entry to revalidate on next use (bodies and ETags are kept)."""
+    try:
+        db = get_api_cache_db()
+        db.execute("UPDATE api_cache SET stored_at = 0")
+        db.commit()
+    except sqlite3.Error:
+        pass
+
+# ---- Cached Helper: safe_api_call behind the ETag cache ---- #
+def cached_api_call(request_function, cost_key=None, revalidate=False):
+    """Like safe_api_call, but served from / revalidated against the on-disk cache.
+    request_function must accept a youtube service object and return an
+    *unexecuted* request:
+        lambda yt: yt.channels().list(...)
+    With revalidate=True a fresh entry is still revalidated with If-None-Match.
+    """
+    if not YOUTUBE_API_KEYS:
+        get_reporter().error("🚫 All API keys exhausted or failed.")
+        return None
+    cache_key = api_cache_key(request_function(get_youtube_api(YOUTUBE_API_KEYS[0])))
+    cached = api_cache_get(cache_key)
+    if cached and cached["fresh"] and not revalidate:
+        return cached["body"]
+
+    def _conditional(yt):
+        request = request_function(yt)
+        if cached and cached["etag"]:
+            request.headers["If-None-Match"] = cached["etag"]
+        try:
+            return request.execute()
+        except HttpError as e:
+            if cached and e.resp.status == 304:
+                return NOT_MODIFIED
+            raise
+
+    response = safe_api_call(_conditional, cost_key)
+    if response is NOT_MODIFIED:
+        api_cache_revalidated(cache_key)
+        return cached["body"]
+    if response:
+        api_cache_put(cache_key, response)
+    return response
+
+# ---- Batched Helper: many independent calls per HTTP round trip ---- #
+def safe_batch_api_call(request_functions, cost_key=None, empty_statuses=(), revalidate=False):
+    """Send independent YouTube API calls as Google batch HTTP requests.
+    Each request_function must accept a youtube service object and return an
+    *unexecuted* request:
+        lambda yt: yt.commentThreads().list(...)
+    Calls are packed BATCH_MAX_CALLS at a time. Returns one response per call in
+    input order; a call that failed yields None. A call rejected with an HTTP
+    status in empty_statuses (e.g. 403 when comments are disabled) is not a
+    failure and yields an empty response, {"items": []}. Quota is counted per
+    call, and calls that hit quotaExceeded are retried on the next key. Calls
+    go through the on-disk ETag cache exactly like cached_api_call.
+    """
+    results = [None] * len(request_functions)
+    if not YOUTUBE_API_KEYS:
+        get_reporter().error("🚫 All API keys exhausted or failed.")
+        return results
+    pending = []
+    cache_keys, cached = {}, {}
+    key_service = get_youtube_api(YOUTUBE_API_KEYS[0])
+    for idx, request_function in enumerate(request_functions):
+        cache_keys[idx] = api_cache_key(request_function(key_service))
+        entry = api_cache_get(cache_keys[idx])
+        if entry and entry["fresh"] and not revalidate:
+            results[idx] = entry["body"]
+            continue
+        if entry:
+            cached[idx] = entry
+        pending.append(idx)
+
+    for _ in range(len(YOUTUBE_API_KEYS)):
+        if not pending:
+            break
+        api_key, youtube_api = get_next_youtube_service()
+        if not youtube_api:
+            continue
+
+        quota_failed = []
+
+        def _callback(request_id, response, exception):
+            idx = int(request_id)
+            if exception is None:
+                results[idx] = response
+                increment_quota(cost_key, api_key)
+                api_cache_put(cache_keys[idx], response)
+            elif isinstance(exception, HttpError) and exception.resp.status == 304 and idx in cached:
+                results[idx] = cached[idx]["body"]
+                increment_quota(cost_key, api_key)
+                api_cache_revalidated(cache_keys[idx])
+            elif isinstance(exception, HttpError) and is_quota_error(exception):
+                quota_failed.append(idx)
+            elif isinstance(exception, HttpError) and exception.resp.status in empty_statuses:
+                results[idx] = {"items": []}
+            elif isinstance(exception, HttpError):
+                # 403/404 on commentThreads is expected — don't alarm the user
+                if exception.resp.status not in [403, 400, 404]:
+                    get_reporter().error(f"❌ API Error: {exception}")
+            else:
+                get_reporter().error(f"❌ API Error: {exception}")
+
+        for start in range(0, len(pending), BATCH_MAX_CALLS):
+            chunk = pending[start:start + BATCH_MAX_CALLS]
+            batch = youtube_api.new_batch_http_request(callback=_callback)
+            for idx in chunk:
+                request = request_functions[idx](youtube_api)
+                if idx in cached and cached[idx]["etag"]:
+                    request.headers["If-None-Match"] = cached[idx]["etag"]
+                batch.add(request, request_id=str(idx))
+            try:
+                batch.execute()
+            except HttpError as e:
+                if is_quota_error(e):
+                    quota_failed.extend(chunk)
+                else:
+                    get_reporter().error(f"❌ Batch API Error: {e}")
+
+        if quota_failed:
+            mark_key_exhausted(api_key)
+            get_reporter().warning(f"🔁 Quota exceeded for key `{key_fingerprint(api_key)}`. Retrying {len(quota_failed)} call(s) on next key...")
+        pending = sorted(quota_failed)
+
+    if pending:
+        get_reporter().error("🚫 All API keys exhausted or failed.")
+    return results
+
+# ---- Video ID validator ---- #
+def is_valid_video_id(video_id):
+    """Validate YouTube video ID: exactly 11 characters (letters, digits, - or _)."""
+    return bool(re.fullmatch(r"[a-zA-Z0-9_-]{11}", video_id))
+
+# ============================================================
+# YouTube API Data Fetching Functions
+# All functions use the _param (underscore-prefix) convention
+# (kept from the @st.cache_data days — repeat lookups are now served by the
+# on-disk ETag cache) and pass it explicitly into every lambda
+# to avoid closure / global-variable bugs.
+# ============================================================
+def get_channel_stats(_channel_id):
+    """Fetch top-level channel statistics and the uploads playlist ID."""
+    response = cached_api_call(
+        lambda yt: yt.channels().list(
+            part="snippet,contentDetails,statistics",
+            id=_channel_id,
+        ),
+        cost_key="channels().list",
+    )
+    if not response or not response.get("items"):
+        return None
+    try:
+        item = response["items"][0]
+        return {
+            "Channel_Id":    _channel_id,
+            "Channel_name":  item["snippet"]["title"],
+            "Subscribers":   item["statistics"].get("subscriberCount", 0),
+            "Views":         item["statistics"].get("viewCount", 0),
+            "Total_videos":  item["statistics"].get("videoCount", 0),
+            # uploads playlist — contains EVERY uploaded video including non-playlist ones
+            "playlist_id":   item["contentDetails"]["relatedPlaylists"]["uploads"],
+        }
+    except KeyError:
+        return None
+
+class ListingIncomplete(Exception):
+    """A playlists() / playlistItems() page could not be fetched, so a listing is partial."""
+
+def get_all_playlists_for_channel(_channel_id, channel_name):
+    """Fetch all public playlists the channel has created."""
+    return fetch_channel_playlists(_channel_id, channel_name)[0]
+
+def fetch_channel_playlists(_channel_id, channel_name):
+    """
+    All public playlists the channel has created, as (playlists, complete).
+    complete is False when a page failed and the list stops short.
+    """
+    playlists = []
+    next_page_token = None
+    while True:
+        # Capture _channel_id and next_page_token in default args to avoid closure bugs
+        response = cached_api_call(
+            lambda yt, cid=_channel_id, tok=next_page_token: yt.playlists().list(
+                part="snippet,contentDetails,status",
+                channelId=cid,
+                maxResults=50,
+                pageToken=tok,
+            ),
+            cost_key="playlists().list",
+        )
+        if not response:
+            return playlists, False
+        for item in response.get("items", []):
+            playlists.append({
+                "playlist_id":    item["id"],
+                "playlist_name":  item["snippet"]["title"],
+                "channel_name":   channel_name,
+                "channel_id":     _channel_id,
+                "description":    item["snippet"].get("description", ""),
+                "item_count":     item["contentDetails"].get("itemCount", 0),
+                "privacy_status": item["status"].get("privacyStatus", "public"),
+                "published_at":   item["snippet"].get("publishedAt"),
+                "harvested_at":   datetime.now().isoformat(),
+            })
+        next_page_token = response.get("nextPageToken")
+        if not next_page_token:
+            break
+    return playlists, True
+
+# ---- Request builders (shared by single and batched calls) ---- #
+def playlist_items_request(yt, playlist_id, page_token=None):
+    return yt.playlistItems().list(
+        part="snippet,contentDetails",
+        playlistId=playlist_id,
+        maxResults=50,
+        pageToken=page_token,
+    )
+
+def comment_threads_request(yt, video_id, max_results=20, page_token=None):
+    return yt.commentThreads().list(
+        part="snippet",
+        videoId=video_id,
+        maxResults=max_results,
+        pageToken=page_token,
+        textFormat="plainText",
+    )
+
+def iter_playlist_video_ids(_playlist_id, first_response=None, stop_ids=None):
+    """
+    Walk a playlist (or the uploads playlist) with playlistItems().list and
+    yield one list of video IDs per API page — no video details are fetched.
+    first_response may carry an already-fetched first playlistItems page
+    (e.g. from safe_batch_api_call); it is used instead of calling the API.
+    If stop_ids is given the walk ends at the first ID found in it — the
+    uploads playlist is newest-first, so this yields only new uploads.
+    Raises ListingIncomplete (after yielding the pages it got) if a page
+    could not be fetched.
+    """
+    next_page_token = None
+    playlist_response = first_response
+
+    while True:
+        if playlist_response is None:
+            playlist_response = cached_api_call(
+                lambda yt, pid=_playlist_id, tok=next_page_token:
+                    playlist_items_request(yt, pid, tok),
+                cost_key="playlistItems().list",
+                revalidate=True,
+            )
+        if playlist_response is None:
+            raise ListingIncomplete(f"playlist {_playlist_id} could not be listed past "
+                                    f"page token {next_page_token or 'start'}")
+        if not playlist_response:
+            break
+
+        page_ids = [
+            item["contentDetails"]["videoId"]
+            for item in playlist_response.get("items", [])
+        ]
+        if not page_ids:
+            break
+        if stop_ids:
+            known = [i for i, vid in enumerate(page_ids) if vid in stop_ids]
+            if known:
+                yield page_ids[:known[0]]
+                break
+        yield page_ids
+
+        next_page_token = playlist_response.get("nextPageToken")
+        if not next_page_token:
+            break
+        playlist_response = None
+
+def parse_video_item(item):
+    """Flatten one videos().list item into the stored video document."""
+    snippet    = item.get("snippet", {})
+    stats      = item.get("statistics", {})
+    content    = item.get("contentDetails", {})
+    return {
+        "video_id":       item["id"],
+        "playlist_id":    None,
+        "video_title":    snippet.get("title", ""),
+        "description":    snippet.get("description", ""),
+        "published_at":   snippet.get("publishedAt"),
+        "category_id":    snippet.get("categoryId", 0),
+        "thumbnail":      snippet.get("thumbnails", {}).get("high", {}).get("url", ""),
+        "duration":       content.get("duration", "PT0S"),
+        "definition":     content.get("definition", "hd"),
+        "caption_status": content.get("caption", "false"),
+        "licensed_content": str(content.get("licensedContent", False)),
+        "view_count":     int(stats.get("viewCount", 0)),
+        "like_count":     int(stats.get("likeCount", 0)),
+        "dislike_count":  int(stats.get("dislikeCount", 0)),
+        "favorite_count": int(stats.get("favoriteCount", 0)),
+        "comment_count":  int(stats.get("commentCount", 0)),
+    }
+
+def iter_video_details(video_ids):
+    """
+    Fetch full details for a set of video IDs — one videos().list call per
+    50 IDs, sent BATCH_MAX_CALLS calls at a time through safe_batch_api_call.
+    Yields (videos, failed_ids) per batch so callers can flush each batch and
+    drop it; failed_ids are the IDs whose videos().list call failed.
+    Each ID should appear only once; the caller is expected to deduplicate.
+    """
+    group = 50 * BATCH_MAX_CALLS
+    for start in range(0, len(video_ids), group):
+        group_ids = video_ids[start:start + group]
+        chunks = [group_ids[i:i + 50] for i in range(0, len(group_ids), 50)]
+        responses = safe_batch_api_call(
+            [
+                lambda yt, ids=",".join(chunk): yt.videos().list(
+                    part="snippet,contentDetails,statistics",
+                    id=ids,
+                )
+                for chunk in chunks
+            ],
+            cost_key="videos().list",
+            revalidate=True,
+        )
+        videos, failed_ids = [], []
+        for chunk, response in zip(chunks, responses):
+            if not response:
+                failed_ids.extend(chunk)
+                continue
+            for item in response.get("items", []):
+                videos.append(parse_video_item(item))
+        yield videos, failed_ids
+
+def get_comments_for_video(_video_id, max_comments=20, first_response=None):
+    """
+    Fetch up to max_comments top-level comments for a single video.
+    Returns [] silently if comments are disabled on the video, and None if a
+    page could not be fetched (the comments seen so far are incomplete).
+    first_response may carry an already-fetched first commentThreads page.
+    """
+    comments = []
+    next_page_token = None
+    response = first_response
+
+    while len(comments) < max_comments:
+        remaining = max_comments - len(comments)
+        if response is None:
+            try:
+                response = cached_api_call(
+                    lambda yt, vid=_video_id, tok=next_page_token, n=min(remaining, 20):
+                        comment_threads_request(yt, vid, n, tok),
+                    cost_key="commentThreads().list",
+                    revalidate=True,
+                )
+            except HttpError as e:
+                # 403 = comments disabled/restricted — skip silently
+                if e.resp.status in [403, 404]:
+                    break
+                return None
+            if response is None:
+                return None     # the call failed — don't pass off a partial list as complete
+        if not response:
+            break
+
+        for item in response.get("items", []):
+            top = item["snippet"]["topLevelComment"]["snippet"]
+            comments.append({
+                "comment_id":   item["id"],
+                "video_id":     _video_id,
+                "comment_text": top.get("textDisplay", ""),
+                "author":       top.get("authorDisplayName", ""),
+                "like_count":   top.get("likeCount", 0),
+                "reply_count":  item["snippet"].get("totalReplyCount", 0),
+                "comment_date": top.get("publishedAt"),
+                "is_pinned":    False,
+                "is_hearted":   False,
+            })
+
+        next_page_token = response.get("nextPageToken")
+        if not next_page_token:
+            break
+        response = None
+
+    return comments
+
+def get_comments_for_videos(video_ids, max_comments=20):
+    """
+    Fetch comments for many videos at once. The first page of every video is
+    sent through safe_batch_api_call; only videos with more pages fall back to
+    one call per page. Returns {video_id: [comments]}; a video whose comments
+    could not be fetched maps to None rather than [], so its stored comments
+    are not mistaken for deleted ones.
+    """
+    first_pages = safe_batch_api_call(
+        [
+            lambda yt, vid=vid: comment_threads_request(yt, vid, min(max_comments, 20))
+            for vid in video_ids
+        ],
+        cost_key="commentThreads().list",
+        empty_statuses=(403, 404),      # comments disabled / video gone — no comments
+        revalidate=True,
+    )
+    comments_by_video = {}
+    for vid, first_page in zip(video_ids, first_pages):
+        if first_page is None:
+            comments_by_video[vid] = None
+            continue
+        comments_by_video[vid] = get_comments_for_video(
+            vid, max_comments=max_comments, first_response=first_page
+        )
+    return comments_by_video
+
+def estimate_harvest_cost(channel_stats, named_playlists, max_comments=50):
+    """
+    Dry-run estimate of a full harvest's quota cost and duration, from
+    Total_videos and the playlist item counts alone — nothing is fetched.
+    Comment pages depend on how many comments each video has, so both a
+    lower bound (one page per video) and an upper bound are returned.
+    units_refresh is the floor of an incremental refresh: the channel and
+    playlist listings, one uploads page and fresh stats for every video.
+    """
+    total_videos = int(channel_stats.get("Total_videos", 0))
+    n_playlists  = len(named_playlists)
+
+    def pages(n):
+        return max(1, math.ceil(n / 50))
+
+    playlist_pages = sum(pages(int(pl.get("item_count", 0))) for pl in named_playlists)
+    upload_pages   = pages(total_videos)
+    video_calls    = math.ceil(total_videos / 50)
+    extra_comment_pages = total_videos * (math.ceil(max_comments / 20) - 1)
+
+    units_min = (
+        API_COST_MAP["channels().list"] * 1
+        + API_COST_MAP["playlists().list"] * pages(n_playlists)
+        + API_COST_MAP["playlistItems().list"] * (playlist_pages + upload_pages)
+        + API_COST_MAP["videos().list"] * video_calls
+        + API_COST_MAP["commentThreads().list"] * total_videos
+    )
+    units_max = units_min + API_COST_MAP["commentThreads().list"] * extra_comment_pages
+    units_refresh = (
+        API_COST_MAP["channels().list"] * 1
+        + API_COST_MAP["playlists().list"] * pages(n_playlists)
+        + API_COST_MAP["playlistItems().list"] * 1
+        + API_COST_MAP["videos().list"] * video_calls
+    )
+
+    # HTTP round trips: first pages and video/comment lookups go out in
+    # batches; later playlist pages are serial, later comment pages run on
+    # the worker pool.
+    trips_min = (
+        1 + pages(n_playlists)
+        + math.ceil((n_playlists + 1) / BATCH_MAX_CALLS)
+        + (playlist_pages - n_playlists) + (upload_pages - 1)
+        + math.ceil(video_calls / BATCH_MAX_CALLS)
+        + math.ceil(math.ceil(total_videos / BATCH_MAX_CALLS) / COMMENT_FETCH_WORKERS)
+    )
+    trips_max = trips_min + math.ceil(extra_comment_pages / COMMENT_FETCH_WORKERS)
+
+    return {
+        "total_videos": total_videos,
+        "playlists":    n_playlists,
+        "units_min":    units_min,
+        "units_max":    units_max,
+        "units_refresh": units_refresh,
+        "seconds_min":  trips_min * API_ROUND_TRIP_SECONDS,
+        "seconds_max":  trips_max * API_ROUND_TRIP_SECONDS,
+    }
+
+def load_known_channel_state(mg_db, channel_id):
+    """
+    Read what MongoDB already holds for a channel, for incremental re-harvest.
+    Returns None if the channel has never been harvested.
+    """
+    meta = mg_db[CHANNELS_COL].find_one({"channel_id": channel_id})
+    if not meta or not meta.get("Harvested_at"):
+        return None
+    videos = {
+        v["video_id"]: v
+        for v in mg_db[VIDEOS_COL].find(
+            {"channel_id": channel_id},
+            {"_id": 0, "video_id": 1, "comment_count": 1, "playlist_id": 1, "playlist_ids": 1},
+        )
+    }
+    playlists = {
+        p["playlist_id"]: p.get("item_count", 0)
+        for p in mg_db[PLAYLISTS_COL].find(
+            {"channel_id": channel_id}, {"_id": 0, "playlist_id": 1, "item_count": 1}
+        )
+    }
+    return {
+        "harvested_at": meta["Harvested_at"],
+        "videos":       videos,
+        "playlists":    playlists,
+    }
+
+# ---- MongoDB schema ---- #
+def ensure_mongo_indexes(mg_db):
+    """Unique natural keys plus the channel_id lookups the UI / migration use (no-op once built)."""
+    mg_db[CHANNELS_COL].create_index("channel_id", unique=True)
+    mg_db[CHANNELS_COL].create_index("Channel_name")
+    mg_db[PLAYLISTS_COL].create_index("playlist_id", unique=True)
+    mg_db[PLAYLISTS_COL].create_index([("channel_id", 1), ("_id", 1)])
+    mg_db[VIDEOS_COL].create_index("video_id", unique=True)
+    mg_db[VIDEOS_COL].create_index([("channel_id", 1), ("published_at", -1)])
+    mg_db[VIDEOS_COL].create_index([("channel_id", 1), ("view_count", -1)])    # top videos
+    mg_db[VIDEOS_COL].create_index([("channel_id", 1), ("_id", 1)])   # resumable migration order
+    mg_db[COMMENTS_COL].create_index("comment_id", unique=True)
+    mg_db[COMMENTS_COL].create_index("video_id")
+    mg_db[COMMENTS_COL].create_index([("channel_id", 1), ("video_id", 1)])
+    mg_db[COMMENTS_COL].create_index([("channel_id", 1), ("_id", 1)])
+    mg_db[SUMMARY_COL].create_index("channel_id", unique=True)
+
+def list_harvested_channels(mg_db):
+    """{channel_id: Channel_name} for every harvested channel, sorted by name."""
+    return {
+        c["channel_id"]: c.get("Channel_name") or c["channel_id"]
+        for c in mg_db[CHANNELS_COL].find({}, {"_id": 0, "channel_id": 1, "Channel_name": 1})
+                                    .sort("Channel_name", 1)
+    }
+
+def delete_channel(mg_db, channel_id):
+    """Remove a channel and everything harvested for it."""
+    for name in (COMMENTS_COL, VIDEOS_COL, PLAYLISTS_COL, CHANNELS_COL, SUMMARY_COL):
+        mg_db[name].delete_many({"channel_id": channel_id})
+
+# ---- Channel summaries ---- #
+# Counts, views and sizes are aggregated once per harvest and stored in
+# SUMMARY_COL, so the DB Manager reads one small document per render instead
+# of counting the shared collections.
+def refresh_channel_summary(mg_db, channel_id):
+    """Recompute and store a channel's summary document; returns it."""
+    channel = mg_db[CHANNELS_COL].find_one({"channel_id": channel_id}, {"_id": 0}) or {}
+    summary = {
+        "channel_id":   channel_id,
+        "Channel_name": channel.get("Channel_name"),
+        "Subscribers":  channel.get("Subscribers"),
+        "Views":        channel.get("Views"),
+        "Total_videos": channel.get("Total_videos"),
+        "Harvested_at": channel.get("Harvested_at"),
+        "total_views":  0,
+    }
+    for name in (PLAYLISTS_COL, VIDEOS_COL, COMMENTS_COL):
+        group = {"_id": None, "count": {"$sum": 1}, "bytes": {"$sum": {"$bsonSize": "$$ROOT"}}}
+        if name == VIDEOS_COL:
+            group["views"] = {"$sum": "$view_count"}
+        row = next(mg_db[name].aggregate([{"$match": {"channel_id": channel_id}}, {"$group": group}]), {})
+        summary[name] = row.get("count", 0)
+        summary[f"{name}_bytes"] = row.get("bytes", 0)
+        if name == VIDEOS_COL:
+            summary["total_views"] = row.get("views", 0)
+    summary["updated_at"] = datetime.now().isoformat()
+    mg_db[SUMMARY_COL].replace_one({"channel_id": channel_id}, summary, upsert=True)
+    return summary
+
+def get_channel_summary(mg_db, channel_id):
+    """
+    The channel's stored summary. Channels harvested before summaries existed
+    fall back to the channel document plus collection-wide estimated counts
+    (flagged "estimated": True) until their next harvest.
+    """
+    summary = mg_db[SUMMARY_COL].find_one({"channel_id": channel_id}, {"_id": 0})
+    if summary:
+        return summary
+    summary = mg_db[CHANNELS_COL].find_one({"channel_id": channel_id}, {"_id": 0}) or {"channel_id": channel_id}
+    for name in (PLAYLISTS_COL, VIDEOS_COL, COMMENTS_COL):
+        summary[name] = mg_db[name].estimated_document_count()
+    summary["estimated"] = True
+    return summary
+
+# ---- Channel browsing ---- #
+# The DB Manager reads a channel's documents a page at a time in _id order
+# (the (channel_id, _id) indexes), projected to the columns it displays.
+BROWSE_PAGE_SIZE = 50
+BROWSE_FIELDS = {
+    VIDEOS_COL:    ["video_id", "video_title", "published_at", "duration", "view_count",
+                    "like_count", "comment_count", "definition", "caption_status"],
+    COMMENTS_COL:  ["comment_id", "video_id", "author", "comment_text", "like_count",
+                    "reply_count", "comment_date", "language", "sentiment_score"],
+    PLAYLISTS_COL: ["playlist_id", "playlist_name", "item_count", "privacy_status", "published_at"],
+}
+
+def top_videos(mg_db, channel_id, limit=10):
+    """The channel's most viewed videos (title and view_count only)."""
+    return list(mg_db[VIDEOS_COL].find(
+        {"channel_id": channel_id}, {"_id": 0, "video_title": 1, "view_count": 1},
+    ).sort("view_count", -1).limit(limit))
+
+def browse_channel_docs(mg_db, collection, channel_id, after=None, page_size=BROWSE_PAGE_SIZE):
+    """
+    One page of a channel's documents in `collection`, projected to
+    BROWSE_FIELDS. Returns (docs, next_after): pass next_after back as
+    `after` for the following page; it is None on the last page.
+    """
+    query = {"channel_id": channel_id}
+    if after is not None:
+        query["_id"] = {"$gt": after}
+    docs = list(mg_db[collection].find(query, {f: 1 for f in BROWSE_FIELDS[collection]})
+                                 .sort("_id", 1).limit(page_size + 1))
+    next_after = docs[page_size - 1]["_id"] if len(docs) > page_size else None
+    docs = docs[:page_size]
+    for doc in docs:
+        del doc["_id"]
+    return docs, next_after
+
+def iter_channel_docs(mg_db, collection, channel_id):
+    """Stream every document a channel has in `collection`, without internal fields."""
+    return mg_db[collection].find(
+        {"channel_id": channel_id}, {"_id": 0, "content_hash": 0, "nlp_hash": 0},
+    ).batch_size(MONGO_WRITE_BATCH)
+
+# ---- Upsert persistence ---- #
+# Each document carries a content_hash of its fields; a re-harvest only
+# writes documents whose hash changed, and readers never see an emptied
+# collection because nothing is deleted before it is replaced.
+
+MONGO_VOLATILE_FIELDS = ("harvested_at",)   # set on every run — ignored for change detection
+
+def content_hash(doc):
+    """Stable hash of a document's harvested fields (ignores _id / content_hash / volatile fields)."""
+    body = {k: v for k, v in doc.items() if k not in ("_id", "content_hash", *MONGO_VOLATILE_FIELDS)}
+    return hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()
+
+def upsert_docs(collection, docs, key):
+    """
+    Idempotent unordered bulk upsert of `docs` keyed on `key`, MONGO_WRITE_BATCH
+    at a time. Documents whose stored content_hash matches are skipped.
+    Returns {"inserted", "updated", "unchanged"} counts.
+    """
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0}
+    for i in range(0, len(docs), MONGO_WRITE_BATCH):
+        batch = docs[i:i + MONGO_WRITE_BATCH]
+        stored = {
+            d[key]: d.get("content_hash")
+            for d in collection.find({key: {"$in": [d[key] for d in batch]}}, {"_id": 0, key: 1, "content_hash": 1})
+        }
+        ops = []
+        for doc in batch:
+            doc["content_hash"] = content_hash(doc)
+            if stored.get(doc[key]) == doc["content_hash"]:
+                stats["unchanged"] += 1
+            else:
+                ops.append(UpdateOne({key: doc[key]}, {"$set": doc}, upsert=True))
+        if ops:
+            result = collection.bulk_write(ops, ordered=False)
+            stats["inserted"] += result.upserted_count
+            stats["updated"]  += result.modified_count
+            # Matched but not modified — a concurrent run already wrote this content
+            stats["unchanged"] += result.matched_count - result.modified_count
+    return stats
+
+def add_write_stats(total, stats):
+    for k, v in stats.items():
+        total[k] = total.get(k, 0) + v
+
+def extract_channel_all_details(_channel_id, mg_db, incremental=False):
+    """
+    Full harvest pipeline for one channel, streamed into MongoDB.
+
+    Video strategy
+    ──────────────
+    1. Fetch the 'uploads' playlist — this contains EVERY video the channel
+       has ever uploaded, including videos not in any named playlist.
+    2. Also fetch all named playlists (for playlist metadata / relationships).
+    3. Deduplicate videos by video_id so a video appearing in both the uploads
+       playlist and a named playlist is only stored once.
+
+    The walk is ID-first: every playlist is listed for video IDs and
+    membership only, then videos().list runs once per unique video (50 IDs
+    per call).
+
+    Streaming
+    ─────────
+    Nothing but IDs is held for the whole run: each batch of video details
+    and each chunk of comments is upserted into the shared playlists /
+    videos / comments collections (tagged with channel_id) as soon as it
+    arrives, then dropped. Only documents whose content_hash changed are
+    written. Documents this run no longer saw are removed at the end (only
+    when every playlists / playlistItems page was fetched), and
+    the channels document (with Harvested_at) is written last, so an
+    interrupted run keeps every page it already stored and the next
+    incremental run starts from the old baseline.
+
+    Incremental mode (channel already in MongoDB)
+    ─────────────────────────────────────────────
+    Only named playlists that are new or whose item_count changed are walked,
+    and the uploads walk stops at the first known video. Stats are refreshed
+    for every video, but comments are only fetched for new videos and for
+    videos whose comment_count changed; stored comments are kept for the rest.
+
+    Returns a summary {"Channel_info", "Meta", "last_updated"} — the harvested
+    documents themselves live only in MongoDB.
+    """
+    report = get_reporter()
+    report.progress(0.0, "📤 Starting YouTube channel harvest...")
+
+    # ── 1. Channel statistics ──────────────────────────────────────────────
+    with report.spinner("Fetching channel statistics..."):
+        channel_stats = get_channel_stats(_channel_id)
+        if not channel_stats:
+            report.warning("⚠️ Channel statistics not available.")
+            return None
+        channel_id       = channel_stats.get("Channel_Id", _channel_id)
+        channel_name     = channel_stats.get("Channel_name", "Unknown")
+        uploads_pl_id    = channel_stats.get("playlist_id")   # hidden uploads playlist
+    report.progress(0.05, "✅ Channel stats fetched.")
+
+    playlist_col = mg_db[PLAYLISTS_COL]
+    videos_col   = mg_db[VIDEOS_COL]
+    comments_col = mg_db[COMMENTS_COL]
+    ensure_mongo_indexes(mg_db)
+    writes = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    # ── 2. Named playlists ────────────────────────────────────────────────
+    with report.spinner("📂 Fetching all named playlists..."):
+        named_playlists, listing_complete = fetch_channel_playlists(_channel_id, channel_name)
+    if not listing_complete:
+        report.warning(f"⚠️ Playlist listing stopped after {len(named_playlists)} playlist(s).")
+    report.progress(0.15, f"✅ {len(named_playlists)} named playlist(s) found.")
+    report.counts(playlists=len(named_playlists))
+
+    # ── Incremental baseline from MongoDB ────────────────────────────────
+    # (read before the playlists below overwrite the stored item counts)
+    known = load_known_channel_state(mg_db, channel_id) if incremental else None
+    if incremental and not known:
+        report.info("ℹ️ Channel not harvested before — running a full harvest.")
+    elif known:
+        report.info(f"♻️ Incremental refresh since {known['harvested_at']} "
+                    f"({len(known['videos'])} known video(s)).")
+
+    # Warn before spending quota if the ledger says this run can't fit
+    estimate  = estimate_harvest_cost(channel_stats, named_playlists)
+    needed    = estimate["units_refresh"] if known else estimate["units_min"]
+    remaining = get_quota_remaining()
+    if needed > remaining:
+        report.warning(f"⚠️ This harvest needs at least {needed:,} units but only "
+                       f"{remaining:,} remain today — it will likely stop part-way.")
+
+    # Named playlists that must be walked — all of them, or only the changed ones
+    if known:
+        walk_playlists = [
+            pl for pl in named_playlists
+            if known["playlists"].get(pl["playlist_id"]) != pl.get("item_count", 0)
+        ]
+    else:
+        walk_playlists = named_playlists
+
+    for pl in named_playlists:
+        pl["channel_id"] = channel_id
+
+    # ── 3. First page of every playlist in batched HTTP requests ─────────
+    playlist_ids = [pl["playlist_id"] for pl in walk_playlists]
+    if uploads_pl_id:
+        playlist_ids.append(uploads_pl_id)
+    with report.spinner("📦 Fetching first page of every playlist in batches..."):
+        first_pages = dict(zip(
+            playlist_ids,
+            safe_batch_api_call(
+                [lambda yt, pid=pid: playlist_items_request(yt, pid) for pid in playlist_ids],
+                cost_key="playlistItems().list",
+                revalidate=True,
+            ),
+        ))
+
+    # ── 4. Phase 1: walk every playlist for video IDs + membership ───────
+    # Only playlistItems().list is called here, so a video that sits in many
+    # playlists is still looked up once in phase 2.
+    membership = {}   # video_id → [named playlist ids], insertion-ordered
+    if known:
+        # Start from stored membership, minus the playlists about to be re-walked
+        rewalked = {pl["playlist_id"] for pl in walk_playlists}
+        live     = {pl["playlist_id"] for pl in named_playlists}
+        for vid, v in known["videos"].items():
+            stored = v.get("playlist_ids")
+            if stored is None:
+                stored = [v["playlist_id"]] if v.get("playlist_id") else []
+            membership[vid] = [pid for pid in stored if pid in live and pid not in rewalked]
+
+    # A page that fails (e.g. quota ran out) leaves listing_complete False:
+    # the videos seen so far are still harvested, but nothing is pruned.
+    unwalked = set()     # playlists whose listing failed part-way
+    total_named = len(walk_playlists)
+    for idx, pl in enumerate(walk_playlists):
+        pid = pl["playlist_id"]
+        with report.spinner(f"📹 Listing videos in playlist {idx + 1}/{total_named}: {pl['playlist_name']}"):
+            try:
+                for page_ids in iter_playlist_video_ids(pid, first_response=first_pages.get(pid)):
+                    for vid in page_ids:
+                        vid_playlists = membership.setdefault(vid, [])
+                        if pid not in vid_playlists:     # a video may be listed twice in one playlist
+                            vid_playlists.append(pid)
+            except ListingIncomplete as e:
+                report.warning(f"⚠️ {e}.")
+                listing_complete = False
+                unwalked.add(pid)
+        pct = 0.15 + 0.2 * ((idx + 1) / max(total_named, 1))
+        report.progress(pct, f"Playlist {idx + 1}/{total_named} done.")
+
+    # Uploads playlist catches videos that are not in any named playlist
+    with report.spinner("📹 Listing all uploaded videos (including those not in any playlist)..."):
+        if uploads_pl_id:
+            new_count = 0
+            try:
+                for page_ids in iter_playlist_video_ids(
+                    uploads_pl_id,
+                    first_response=first_pages.get(uploads_pl_id),
+                    stop_ids=known["videos"] if known else None,
+                ):
+                    for vid in page_ids:
+                        if vid not in membership:
+                            membership[vid] = []
+                            new_count += 1
+            except ListingIncomplete as e:
+                report.warning(f"⚠️ {e}.")
+                listing_complete = False
+            if new_count:
+                report.info(f"ℹ️ {new_count} additional video(s) found outside named playlists.")
+
+    # Playlists are stored once walked. One whose walk failed keeps its old
+    # item_count, so the next incremental run walks it again.
+    for pl in named_playlists:
+        if pl["playlist_id"] in unwalked:
+            pl["item_count"] = known["playlists"].get(pl["playlist_id"]) if known else None
+    add_write_stats(writes, upsert_docs(playlist_col, named_playlists, "playlist_id"))
+
+    # Validate video IDs before spending quota on them
+    video_ids   = list(membership)
+    valid_ids   = [vid for vid in video_ids if is_valid_video_id(vid)]
+    skipped     = len(video_ids) - len(valid_ids)
+    if skipped:
+        report.warning(f"⚠️ {skipped} invalid video ID(s) skipped.")
+    video_ids = valid_ids
+    report.progress(0.38, f"✅ {len(video_ids)} unique video ID(s) collected.")
+    report.counts(video_ids=len(video_ids))
+
+    # ── 5. Phase 2: details for the deduplicated ID set, streamed to MongoDB ─
+    comment_counts = {}      # video_id → comment_count, for the comment phase
+    failed_video_ids = []
+    with report.spinner(f"🎞️ Fetching details for {len(video_ids)} unique video(s)..."):
+        for videos, failed_ids in iter_video_details(video_ids):
+            for v in videos:
+                pl_ids = membership.get(v["video_id"], [])
+                v["playlist_ids"] = pl_ids
+                # Last named playlist wins; None marks a video with no named playlist
+                v["playlist_id"]  = pl_ids[-1] if pl_ids else None
+                v["channel_id"]   = channel_id
+                comment_counts[v["video_id"]] = v["comment_count"]
+            add_write_stats(writes, upsert_docs(videos_col, videos, "video_id"))
+            failed_video_ids.extend(failed_ids)
+            done = len(comment_counts) + len(failed_video_ids)
+            report.progress(0.38 + 0.07 * (done / max(len(video_ids), 1)),
+                            f"Video details: {done}/{len(video_ids)}")
+    del membership
+    video_ids = list(comment_counts)
+    report.progress(0.45, f"✅ {len(video_ids)} unique video(s) collected.")
+    report.counts(videos=len(video_ids))
+
+    # Incremental: only new videos and videos whose comment_count changed
+    if known:
+        comment_ids = [
+            vid for vid in video_ids
+            if vid not in known["videos"]
+            or known["videos"][vid].get("comment_count") != comment_counts[vid]
+        ]
+        report.info(f"ℹ️ Fetching comments for {len(comment_ids)} new/changed video(s); "
+                    f"{len(video_ids) - len(comment_ids)} unchanged video(s) keep stored comments.")
+    else:
+        comment_ids = video_ids
+
+    # ── 6. Comments for each video (bounded worker pool, streamed) ────────
+    # Videos are split into chunks of BATCH_MAX_CALLS; each worker sends one
+    # batched request per chunk for the first comment pages. Workers inherit
+    # the caller's reporter; progress and MongoDB writes happen on this
+    # thread as each chunk completes, and the chunk is then released.
+    total_vids   = len(comment_ids)
+    chunks = [comment_ids[i:i + BATCH_MAX_CALLS] for i in range(0, total_vids, BATCH_MAX_CALLS)]
+    fetched_comments = 0
+    failed_comment_ids = []
+
+    with report.spinner("💬 Fetching comments..."):
+        with ThreadPoolExecutor(max_workers=COMMENT_FETCH_WORKERS) as pool:
+            futures = {
+                submit_in_context(pool, get_comments_for_videos, chunk, max_comments=50): chunk
+                for chunk in chunks
+            }
+            done_vids = 0
+            for future in as_completed(futures):
+                chunk = futures.pop(future)
+                try:
+                    by_video = future.result()
+                except Exception as e:
+                    report.warning(f"⚠️ Comment fetch failed for {len(chunk)} video(s): {e}")
+                    failed_comment_ids.extend(chunk)
+                else:
+                    # Videos whose fetch failed keep their stored comments untouched
+                    fetched_vids = [vid for vid in chunk if by_video.get(vid) is not None]
+                    failed_comment_ids.extend(vid for vid in chunk if by_video.get(vid) is None)
+                    chunk_comments = [c for vid in fetched_vids for c in by_video[vid]]
+                    for c in chunk_comments:
+                        c["channel_id"] = channel_id
+                    add_write_stats(writes, upsert_docs(comments_col, chunk_comments, "comment_id"))
+                    # Comments that dropped out of these videos' fetched pages
+                    if fetched_vids:
+                        comments_col.delete_many({
+                            "video_id":   {"$in": fetched_vids},
+                            "comment_id": {"$nin": [c["comment_id"] for c in chunk_comments]},
+                        })
+                    fetched_comments += len(chunk_comments)
+                del future
+                done_vids += len(chunk)
+                pct = 0.45 + 0.45 * (done_vids / max(total_vids, 1))
+                report.progress(pct, f"Comments: video {done_vids}/{total_vids}")
+    report.progress(0.92, "✅ Comments fetched.")
+
+    # ── 7. Drop what this run no longer saw, then write meta ─────────────
+    if not listing_complete:
+        report.warning("⚠️ Some playlist pages could not be fetched — videos and playlists missing "
+                       "from this run were kept rather than pruned.")
+    else:
+        with report.spinner("🧹 Removing videos / playlists no longer on the channel..."):
+            live_playlists = {pl["playlist_id"] for pl in named_playlists}
+            stale_playlists = [pid for pid in playlist_col.distinct("playlist_id", {"channel_id": channel_id})
+                               if pid not in live_playlists]
+            if stale_playlists:
+                playlist_col.delete_many({"playlist_id": {"$in": stale_playlists}})
+            keep = set(comment_counts).union(failed_video_ids)
+            stale_ids = [vid for vid in videos_col.distinct("video_id", {"channel_id": channel_id})
+                         if vid not in keep]
+            if stale_ids:
+                videos_col.delete_many({"video_id": {"$in": stale_ids}})
+                comments_col.delete_many({"video_id": {"$in": stale_ids}})
+
+    report.info(f"💾 MongoDB writes: {writes['inserted']:,} inserted, {writes['updated']:,} updated, "
+                f"{writes['unchanged']:,} unchanged.")
+
+    mg_db[CHANNELS_COL].replace_one({"channel_id": channel_id}, {
+        "channel_id":   channel_id,
+        "Channel_Id":   channel_stats.get("Channel_Id"),
+        "Channel_name": channel_stats.get("Channel_name"),
+        "Subscribers":  channel_stats.get("Subscribers"),
+        "Views":        channel_stats.get("Views"),
+        "Total_videos": channel_stats.get("Total_videos"),
+        "Harvested_at": datetime.now().isoformat(),
+    }, upsert=True)
+    summary = refresh_channel_summary(mg_db, channel_id)
+    total_comments = summary[COMMENTS_COL]
+    report.counts(comments=total_comments, **writes)
+
+    if failed_video_ids or failed_comment_ids:
+        report.warning(f"⚠️ {len(failed_video_ids)} video detail and {len(failed_comment_ids)} "
+                       f"comment lookup(s) failed — their stored data was kept.")
+
+    # ── 8. Summary ────────────────────────────────────────────────────────
+    channel_data = {
+        "Channel_info":  channel_stats,
+        "Meta": {
+            "Total_Videos":     len(video_ids),
+            "Total_Comments":   total_comments,
+            "Fetched_Comments": fetched_comments,
+            "Incremental":      bool(known),
+            "Writes":           writes,
+        },
+        "last_updated": datetime.now().isoformat(),
+    }
+
+    # Audit log
+    mg_db["audit_logs"].insert_one({
+        "channel_id":    channel_id,
+        "channel_name":  channel_name,
+        "status":        "success",
+        "mode":          "incremental" if known else "full",
+        "video_count":   len(video_ids),
+        "comment_count": total_comments,
+        "writes":        writes,
+        "timestamp":     datetime.now().isoformat(),
+    })
+
+    report.progress(1.0, "✅ Harvest complete!")
+    return channel_data
+
+def load_channel_data(mg_db, channel_id):
+    """Rebuild the extract_channel_all_details() payload for a channel from
+    MongoDB — reads every document, so only build it on request (exports)."""
+    meta = mg_db[CHANNELS_COL].find_one({"channel_id": channel_id}, {"_id": 0})
+    if not meta:
+        return None
+    videos = list(iter_channel_docs(mg_db, VIDEOS_COL, channel_id))
+    comments = list(iter_channel_docs(mg_db, COMMENTS_COL, channel_id))
+    return {
+        "Channel_info":  meta,
+        "playlist_info": list(iter_channel_docs(mg_db, PLAYLISTS_COL, channel_id)),
+        "Video_info":    videos,
+        "Comment_info":  comments,
+        "Meta": {
+            "Total_Videos":   len(videos),
+            "Total_Comments": len(comments),
+        },
+        "last_updated": meta.get("Harvested_at"),
+    }
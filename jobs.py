@@ -0,0 +1,245 @@
+# ----- Import Basic Packages ----- #
+import time
+import threading
+import traceback
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# ------ Import the shared harvesting / warehouse core ------ #
+from reporter import Reporter, use_reporter, get_reporter
+from harvest import (
+    get_channel_stats, get_all_playlists_for_channel, estimate_harvest_cost,
+    get_quota_remaining, extract_channel_all_details, CHANNELS_COL,
+)
+from postgres_db import get_pg_pool, store_postgresql_direct, migrate_to_postgresql
+
+# ============================================================
+# Background Job Queue
+# Extraction and migration run on a small local worker pool instead of inside
+# the Streamlit script run, so widget clicks / reruns no longer interrupt
+# them. Every job is a document in the `jobs` collection (next to
+# `audit_logs`) holding its status, stage, progress, per-stage counts and
+# recent messages; the UI only polls those documents.
+# ============================================================
+MAX_CONCURRENT_JOBS = 3          # jobs running at once (each has its own API worker pool)
+JOB_PROGRESS_INTERVAL = 1.0      # seconds between progress writes to MongoDB
+JOB_MAX_MESSAGES = 50            # most recent messages kept per job
+QUOTA_WAIT_SECONDS = 30          # re-check interval while a job waits for quota
+
+JOB_QUEUED    = "queued"
+JOB_WAITING   = "waiting_for_quota"
+JOB_RUNNING   = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED    = "failed"
+JOB_INTERRUPTED = "interrupted"
+ACTIVE_STATES = [JOB_QUEUED, JOB_WAITING, JOB_RUNNING]
+
+
+class JobReporter(Reporter):
+    """Persists a job's progress, counts and messages to its MongoDB document."""
+
+    def __init__(self, jobs_col, job_id):
+        super().__init__(prefix=str(job_id), verbose=False)
+        self.jobs_col = jobs_col
+        self.job_id = job_id
+        self._last_write = 0.0
+
+    def _update(self, update):
+        self.jobs_col.update_one({"_id": self.job_id}, update)
+
+    def _log(self, level, message):
+        self._update({"$push": {"messages": {
+            "$each":  [{"level": level, "message": message, "at": datetime.now().isoformat()}],
+            "$slice": -JOB_MAX_MESSAGES,
+        }}})
+
+    def info(self, message):
+        self._log("info", message)
+
+    def success(self, message):
+        self._log("success", message)
+
+    def warning(self, message):
+        self._log("warning", message)
+
+    def error(self, message):
+        super().error(message)
+        self._log("error", message)
+
+    def progress(self, fraction, text=""):
+        # Throttled — the comment stage reports once per batch of videos
+        now = time.monotonic()
+        if fraction < 1.0 and now - self._last_write < JOB_PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        self._update({"$set": {"progress": float(fraction), "stage": text, "quota_used": self.quota_used}})
+
+    def spinner(self, text):
+        self._update({"$set": {"stage": text}})
+        return super().spinner(text)
+
+    def counts(self, **counts):
+        self._update({"$set": {f"counts.{k}": v for k, v in counts.items()}})
+
+
+class JobQueue:
+    """
+    Process-wide queue of background harvest / migration jobs.
+    Extraction jobs reserve their estimated minimum quota before starting, so
+    concurrent jobs never together plan to spend more than the ledger has left.
+    """
+
+    def __init__(self, mg_db, pg_settings=None, max_workers=MAX_CONCURRENT_JOBS):
+        self.mg_db = mg_db
+        self.jobs_col = mg_db["jobs"]
+        self.pg_settings = pg_settings
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ydh-job")
+        self._quota_cond = threading.Condition()
+        self._submit_lock = threading.Lock()
+        self._reservations = {}     # job_id → (units reserved, the job's reporter, its quota_used then)
+        self.jobs_col.create_index([("created_at", -1)])
+        self.jobs_col.create_index([("kind", 1), ("created_at", -1)])
+        self.jobs_col.create_index([("kind", 1), ("params.channel_id", 1), ("status", 1)])
+        # Jobs left active by a previous process can never finish
+        self.jobs_col.update_many(
+            {"status": {"$in": ACTIVE_STATES}},
+            {"$set": {"status": JOB_INTERRUPTED, "finished_at": datetime.now().isoformat()}},
+        )
+
+    # ── Submission ──────────────────────────────────────────
+    def _create(self, kind, params):
+        job_id = self.jobs_col.insert_one({
+            "kind":       kind,
+            "params":     params,
+            "status":     JOB_QUEUED,
+            "stage":      "Queued",
+            "progress":   0.0,
+            "counts":     {},
+            "messages":   [],
+            "quota_used": 0,
+            "created_at": datetime.now().isoformat(),
+        }).inserted_id
+        return job_id
+
+    # At most one active job per (kind, channel): two extractions would race
+    # each other's upserts and pruning, two migrations each other's checkpoints.
+    # Submitting again returns the active job's id instead.
+    def find_active(self, kind, channel_id):
+        job = self.jobs_col.find_one(
+            {"kind": kind, "params.channel_id": channel_id, "status": {"$in": ACTIVE_STATES}}, {"_id": 1})
+        return job["_id"] if job else None
+
+    def submit_extract(self, channel_id, incremental=False, store_pgsql=False):
+        with self._submit_lock:
+            job_id = self.find_active("extract", channel_id)
+            if job_id:
+                return job_id
+            job_id = self._create("extract", {
+                "channel_id": channel_id, "incremental": incremental, "store_pgsql": store_pgsql,
+            })
+        self.pool.submit(self._run, job_id, self._extract, channel_id, incremental, store_pgsql)
+        return job_id
+
+    def submit_migrate(self, channel_id, channel_name=None):
+        with self._submit_lock:
+            job_id = self.find_active("migrate", channel_id)
+            if job_id:
+                return job_id
+            job_id = self._create("migrate", {"channel_id": channel_id, "channel_name": channel_name})
+        self.pool.submit(self._run, job_id, self._migrate, channel_id, channel_name)
+        return job_id
+
+    # ── Polling ─────────────────────────────────────────────
+    def get_job(self, job_id):
+        return self.jobs_col.find_one({"_id": job_id})
+
+    def list_jobs(self, limit=20, kind=None):
+        query = {"kind": kind} if kind else {}
+        return list(self.jobs_col.find(query).sort("created_at", -1).limit(limit))
+
+    def active_count(self):
+        return self.jobs_col.count_documents({"status": {"$in": ACTIVE_STATES}})
+
+    # ── Execution ───────────────────────────────────────────
+    def _run(self, job_id, work, *args):
+        reporter = JobReporter(self.jobs_col, job_id)
+        self.jobs_col.update_one({"_id": job_id}, {"$set": {
+            "status": JOB_RUNNING, "started_at": datetime.now().isoformat(),
+        }})
+        try:
+            with use_reporter(reporter):
+                result = work(job_id, *args)
+            status = JOB_SUCCEEDED if result else JOB_FAILED
+            update = {"status": status, "result": result or {}}
+        except Exception as e:
+            traceback.print_exc()
+            update = {"status": JOB_FAILED, "error": str(e)}
+        if update["status"] == JOB_SUCCEEDED:
+            update["progress"] = 1.0
+        update.update(quota_used=reporter.quota_used, finished_at=datetime.now().isoformat())
+        self.jobs_col.update_one({"_id": job_id}, {"$set": update})
+
+    def _unspent_reserved(self):
+        # What a running job has already spent is gone from get_quota_remaining(),
+        # so only the rest of its reservation is still held back
+        return sum(max(units - (reporter.quota_used - spent_before), 0)
+                   for units, reporter, spent_before in self._reservations.values())
+
+    def _reserve_quota(self, job_id, units):
+        """Block until `units` of today's quota are unreserved; False if they never can be."""
+        with self._quota_cond:
+            while True:
+                available = get_quota_remaining() - self._unspent_reserved()
+                if units <= available:
+                    if units:
+                        reporter = get_reporter()
+                        self._reservations[job_id] = (units, reporter, reporter.quota_used)
+                    return True
+                if not self._reservations:
+                    return False     # nothing running will free quota — give up
+                self.jobs_col.update_one({"_id": job_id}, {"$set": {
+                    "status": JOB_WAITING,
+                    "stage":  f"Waiting for quota — needs {units:,}, {max(available, 0):,} unreserved",
+                }})
+                self._quota_cond.wait(QUOTA_WAIT_SECONDS)
+
+    def _release_quota(self, job_id):
+        with self._quota_cond:
+            self._reservations.pop(job_id, None)
+            self._quota_cond.notify_all()
+
+    def _extract(self, job_id, channel_id, incremental, store_pgsql):
+        stats = get_channel_stats(channel_id)
+        if not stats:
+            raise ValueError(f"Channel {channel_id} not found")
+        playlists = get_all_playlists_for_channel(channel_id, stats.get("Channel_name", "Unknown"))
+        estimate = estimate_harvest_cost(stats, playlists)
+        # An incremental run on a channel with no stored state is a full harvest
+        harvested = incremental and self.mg_db[CHANNELS_COL].count_documents({"channel_id": channel_id}, limit=1)
+        reserve = estimate["units_refresh"] if harvested else estimate["units_min"]
+        if not self._reserve_quota(job_id, reserve):
+            raise RuntimeError(f"Not enough quota left today (needs ≥ {reserve:,} units)")
+        self.jobs_col.update_one({"_id": job_id}, {"$set": {"status": JOB_RUNNING}})
+        try:
+            data = extract_channel_all_details(channel_id, self.mg_db, incremental=incremental)
+        finally:
+            self._release_quota(job_id)
+        if not data:
+            return None
+        if store_pgsql and self.pg_settings:
+            with get_pg_pool(self.pg_settings).connection() as conn:
+                store_postgresql_direct(conn, data)
+        return {
+            "channel_id":   channel_id,
+            "channel_name": data["Channel_info"].get("Channel_name"),
+            "videos":       data["Meta"]["Total_Videos"],
+            "comments":     data["Meta"]["Total_Comments"],
+        }
+
+    def _migrate(self, job_id, channel_id, channel_name):
+        with get_pg_pool(self.pg_settings).connection() as conn:
+            result = migrate_to_postgresql(conn, channel_id, self.mg_db)
+        if result:
+            result.update(channel_id=channel_id, channel_name=channel_name)
+        return result
+
@@ -0,0 +1,100 @@
+# ----- Import Basic Packages ----- #
+import sys
+import argparse
+
+# --------- Import Packages for DB --------- #
+from pymongo import MongoClient
+
+# ------ Import the shared harvesting core ------ #
+from harvest import (
+    SECRETS_PATH, MONGO_DB_NAME, MONGO_WRITE_BATCH, load_secrets,
+    CHANNELS_COL, PLAYLISTS_COL, VIDEOS_COL, COMMENTS_COL,
+    ensure_mongo_indexes, upsert_docs, add_write_stats, refresh_channel_summary,
+)
+
+# ============================================================
+# MongoDB Schema Migration
+# Moves channels harvested before the shared schema — four collections per
+# channel named {Channel_name}_meta / _playlist / _videos / _comments — into
+# the channels / playlists / videos / comments collections keyed by
+# channel_id. Safe to re-run: documents are upserted on their natural keys.
+#
+#   python migrate_mongo_schema.py --drop-legacy
+# ============================================================
+LEGACY_SUFFIXES = {
+    "_playlist": (PLAYLISTS_COL, "playlist_id"),
+    "_videos":   (VIDEOS_COL, "video_id"),
+    "_comments": (COMMENTS_COL, "comment_id"),
+}
+
+def list_legacy_channels(mg_db):
+    """Channel names that still have a legacy {name}_meta collection."""
+    return sorted(c[:-len("_meta")] for c in mg_db.list_collection_names() if c.endswith("_meta"))
+
+
+def migrate_legacy_channel(mg_db, channel_name, drop_legacy=False):
+    """Copy one legacy channel into the shared collections; return per-entity write counts."""
+    meta = mg_db[f"{channel_name}_meta"].find_one({}, {"_id": 0})
+    if not meta or not meta.get("Channel_Id"):
+        raise ValueError(f"{channel_name}_meta has no Channel_Id")
+    channel_id = meta["Channel_Id"]
+
+    result = {}
+    for suffix, (target, key) in LEGACY_SUFFIXES.items():
+        writes = {}
+        batch = []
+        for doc in mg_db[f"{channel_name}{suffix}"].find({}, {"_id": 0}).batch_size(MONGO_WRITE_BATCH):
+            doc["channel_id"] = channel_id
+            batch.append(doc)
+            if len(batch) == MONGO_WRITE_BATCH:
+                add_write_stats(writes, upsert_docs(mg_db[target], batch, key))
+                batch = []
+        if batch:
+            add_write_stats(writes, upsert_docs(mg_db[target], batch, key))
+        result[target] = writes
+
+    # Channel document last — it is what marks the channel as harvested
+    meta["channel_id"] = channel_id
+    mg_db[CHANNELS_COL].replace_one({"channel_id": channel_id}, meta, upsert=True)
+    refresh_channel_summary(mg_db, channel_id)
+
+    if drop_legacy:
+        for suffix in ["_meta", *LEGACY_SUFFIXES]:
+            mg_db[f"{channel_name}{suffix}"].drop()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move per-channel MongoDB collections into the shared schema.")
+    parser.add_argument("--drop-legacy", action="store_true",
+                        help="drop each channel's old collections after it is migrated")
+    parser.add_argument("--secrets", default=SECRETS_PATH, help=f"secrets.toml path (default {SECRETS_PATH})")
+    args = parser.parse_args(argv)
+
+    secrets = load_secrets(args.secrets)
+    mg_db = MongoClient(secrets["mongodb"]["connection_url"], serverSelectionTimeoutMS=3000)[MONGO_DB_NAME]
+    ensure_mongo_indexes(mg_db)
+
+    channels = list_legacy_channels(mg_db)
+    if not channels:
+        print("No legacy per-channel collections found.", file=sys.stderr)
+        return 0
+
+    failed = 0
+    for channel_name in channels:
+        try:
+            result = migrate_legacy_channel(mg_db, channel_name, drop_legacy=args.drop_legacy)
+        except Exception as e:
+            failed += 1
+            print(f"FAILED   {channel_name}: {e}", file=sys.stderr)
+            continue
+        summary = "  ".join(
+            f"{target}: {sum(w.values()):,} ({w.get('inserted', 0):,} new)" for target, w in result.items()
+        )
+        print(f"migrated {channel_name}  {summary}", file=sys.stderr)
+    print(f"\n{len(channels) - failed}/{len(channels)} channel(s) migrated.", file=sys.stderr)
+    return 0 if not failed else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+# ----- Import Basic Packages ----- #
+import os
+import hashlib
+import itertools
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# ------ Import Packages for NLP ------ #
+from textblob import TextBlob
+from langdetect import detect, DetectorFactory
+
+# --------- Import Packages for DB --------- #
+from pymongo import UpdateOne
+
+from reporter import get_reporter
+from harvest import COMMENTS_COL, MONGO_WRITE_BATCH
+
+# ============================================================
+# Comment Scoring
+# Sentiment (TextBlob polarity) and language (langdetect) are CPU-bound, so
+# comments are scored in chunks on a process pool. Chunks come back in
+# input order and only a few are in flight at a time, so the caller can
+# write earlier chunks while later ones are still being scored.
+# ============================================================
+NLP_WORKERS = os.cpu_count() or 1
+NLP_CHUNK_SIZE = 500          # comments per task sent to a worker
+NLP_LANGDETECT_SEED = 0       # langdetect is randomised — fix it so every worker agrees
+DEFAULT_LANGUAGE = "en"
+
+def _init_worker():
+    DetectorFactory.seed = NLP_LANGDETECT_SEED
+
+def score_text(text):
+    """(language, sentiment_score) for one comment; sentiment is None if scoring fails."""
+    text = text or ""
+    try:
+        sentiment = TextBlob(text).sentiment.polarity
+        lang = detect(text) if text.strip() else DEFAULT_LANGUAGE
+    except Exception:
+        sentiment = None
+        lang = DEFAULT_LANGUAGE
+    return lang, sentiment
+
+def score_chunk(texts):
+    return [score_text(t) for t in texts]
+
+def iter_scores(text_chunks, workers=NLP_WORKERS):
+    """
+    Score an iterable of text chunks; yields one [(language, sentiment_score)]
+    list per chunk, in input order. At most 2 × workers chunks are queued.
+    workers <= 1 scores in the calling process.
+    """
+    text_chunks = iter(text_chunks)
+    first = next(text_chunks, None)
+    if first is None:
+        return      # nothing to score — don't start a pool
+    text_chunks = itertools.chain([first], text_chunks)
+    if workers <= 1:
+        _init_worker()
+        for texts in text_chunks:
+            yield score_chunk(texts)
+        return
+    # spawn — forking the multi-threaded Streamlit / job process is unsafe
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker) as pool:
+        in_flight = deque()
+        for texts in text_chunks:
+            in_flight.append(pool.submit(score_chunk, list(texts)))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+# ============================================================
+# Persisted Enrichment
+# language / sentiment_score are stored on each comment in MongoDB together
+# with nlp_hash, a hash of the comment_text they were computed from. Only
+# comments that are new or whose text changed are scored, chunk by chunk, so
+# an interrupted run resumes where it stopped and a re-migration does no
+# NLP work at all.
+# ============================================================
+def text_hash(text):
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+def enrich_comments(mg_db, channel_id, workers=NLP_WORKERS):
+    """Score a channel's new / edited comments and store the results; returns how many were scored."""
+    report = get_reporter()
+    comments_col = mg_db[COMMENTS_COL]
+    cursor = comments_col.find(
+        {"channel_id": channel_id}, {"_id": 0, "comment_id": 1, "comment_text": 1, "nlp_hash": 1},
+    ).batch_size(MONGO_WRITE_BATCH)
+
+    pending = deque()     # (comment_id, hash) chunks waiting for their scores, in order
+    def texts():
+        chunk = []
+        for c in cursor:
+            text = c.get("comment_text") or ""
+            h = text_hash(text)
+            if c.get("nlp_hash") != h:
+                chunk.append((c["comment_id"], h, text))
+            if len(chunk) == NLP_CHUNK_SIZE:
+                pending.append(chunk)
+                yield [t for _, _, t in chunk]
+                chunk = []
+        if chunk:
+            pending.append(chunk)
+            yield [t for _, _, t in chunk]
+
+    scored = 0
+    with report.spinner("🧠 Scoring sentiment / language for new or edited comments..."):
+        for scores in iter_scores(texts(), workers):
+            chunk = pending.popleft()
+            comments_col.bulk_write([
+                UpdateOne({"comment_id": cid}, {"$set": {
+                    "language": lang, "sentiment_score": sentiment, "nlp_hash": h,
+                }})
+                for (cid, h, _), (lang, sentiment) in zip(chunk, scores)
+            ], ordered=False)
+            scored += len(chunk)
+    report.info(f"🧠 {scored:,} comment(s) scored" if scored else "🧠 All comments already scored.")
+    report.counts(comments_scored=scored)
+    return scored
@@ -0,0 +1,802 @@
+# ----- Import Basic Packages ----- #
+import io
+import time
+import itertools
+import traceback
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import isodate
+
+# --------- Import Packages for DB --------- #
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+from psycopg2.extras import execute_values
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2 import sql
+from bson import ObjectId
+
+from reporter import get_reporter
+from nlp import enrich_comments
+from harvest import CHANNELS_COL, PLAYLISTS_COL, VIDEOS_COL, COMMENTS_COL, ensure_mongo_indexes
+
+# ============================================================
+# PostgreSQL Warehouse
+# Schema creation, direct channel store and MongoDB → PostgreSQL migration.
+# Shared by the Streamlit UI (YDH.py), batch_harvest.py and background jobs;
+# messages / progress go to reporter.get_reporter().
+# ============================================================
+# ---- Connection pool sizing ---- optional pool_min / pool_max in [postgres] #
+PG_POOL_MIN = 1
+PG_POOL_MAX = 8
+PG_HEALTHCHECK_IDLE = 30     # seconds idle before a borrowed connection is pinged
+
+
+class PostgresPool:
+    """
+    Thread-safe PostgreSQL connection pool shared by the UI, background jobs
+    and the batch CLI. Borrowing blocks while all pool_max connections are in
+    use; connections idle for PG_HEALTHCHECK_IDLE seconds are pinged first,
+    and dead or broken ones are closed and replaced with fresh connections.
+
+        with pool.connection() as conn:
+            ...
+    """
+
+    def __init__(self, pg_settings):
+        settings = dict(pg_settings)
+        self.minconn = int(settings.pop("pool_min", PG_POOL_MIN))
+        self.maxconn = int(settings.pop("pool_max", PG_POOL_MAX))
+        self._pool = ThreadedConnectionPool(self.minconn, self.maxconn, **settings)
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+        self._last_used = {}
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        if time.monotonic() - self._last_used.get(id(conn), 0) < PG_HEALTHCHECK_IDLE:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _getconn(self):
+        conn = self._pool.getconn()
+        if not self._healthy(conn):
+            # Reconnect — drop the dead connection and let the pool open a new one
+            self._pool.putconn(conn, close=True)
+            conn = self._pool.getconn()
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it is rolled back (if left mid-transaction) and returned on exit."""
+        with self._slots:
+            conn = self._getconn()
+            broken = False
+            try:
+                yield conn
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                broken = True
+                raise
+            finally:
+                if not conn.closed and not broken:
+                    try:
+                        if conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                            conn.rollback()
+                    except psycopg2.Error:
+                        broken = True
+                broken = broken or bool(conn.closed)
+                if broken:
+                    self._last_used.pop(id(conn), None)
+                else:
+                    self._last_used[id(conn)] = time.monotonic()
+                self._pool.putconn(conn, close=broken)
+
+    def closeall(self):
+        self._pool.closeall()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pg_pool(pg_settings):
+    """Process-wide PostgresPool for these settings, created on first use."""
+    key = tuple(sorted((k, str(v)) for k, v in pg_settings.items()))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = PostgresPool(pg_settings)
+        return _pools[key]
+
+# ---- ISO 8601 duration → HH:MM:SS ---- #
+def parse_duration_to_hms(duration_str):
+    try:
+        duration = isodate.parse_duration(duration_str)
+        total_seconds = int(duration.total_seconds())
+        hours = total_seconds // 3600
+        minutes = (total_seconds % 3600) // 60
+        seconds = total_seconds % 60
+        return f"{hours:02}:{minutes:02}:{seconds:02}"
+    except Exception:
+        return None
+
+# ---- Warehouse data version ---- #
+# Bumped in the same transaction as every write the analyzer can see, so
+# cached query results keyed on it are invalidated exactly when data changes.
+def ensure_warehouse_version(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS warehouse_version (
+            id         INT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+            version    BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    cur.execute("INSERT INTO warehouse_version (id) VALUES (1) ON CONFLICT (id) DO NOTHING;")
+
+def bump_warehouse_version(cur):
+    cur.execute("UPDATE warehouse_version SET version = version + 1, updated_at = %s WHERE id = 1;",
+                (datetime.now(),))
+
+def get_warehouse_version(conn):
+    """Current warehouse data version (0 before anything was ever written)."""
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT version FROM warehouse_version WHERE id = 1;")
+            row = cur.fetchone()
+        return row[0] if row else 0
+    except psycopg2.ProgrammingError:     # table not created yet
+        conn.rollback()
+        return 0
+
+def store_postgresql_direct(conn, data):
+    """Store basic channel info directly to PostgreSQL right after harvest."""
+    report = get_reporter()
+    with report.spinner("🔧 Storing basic channel info in PostgreSQL..."):
+        try:
+            ch_basic = data.get("Channel_info", {})
+            channel_id = ch_basic.get("Channel_Id")
+            if not channel_id:
+                report.error("❌ Channel_Id is missing. Skipping database insert.")
+                return
+            with conn.cursor() as cur:
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS channel_table_direct (
+                        channel_id    VARCHAR(50) PRIMARY KEY,
+                        channel_name  VARCHAR(255),
+                        subscribers   BIGINT,
+                        channel_views BIGINT,
+                        total_videos  BIGINT,
+                        harvested_time TIMESTAMP
+                    );
+                """)
+                cur.execute("""
+                    INSERT INTO channel_table_direct
+                        (channel_id, channel_name, subscribers, channel_views, total_videos, harvested_time)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (channel_id) DO UPDATE SET
+                        channel_name   = EXCLUDED.channel_name,
+                        subscribers    = EXCLUDED.subscribers,
+                        channel_views  = EXCLUDED.channel_views,
+                        total_videos   = EXCLUDED.total_videos,
+                        harvested_time = EXCLUDED.harvested_time;
+                """, (
+                    channel_id,
+                    ch_basic.get("Channel_name"),
+                    int(ch_basic.get("Subscribers", 0)),
+                    int(ch_basic.get("Views", 0)),
+                    int(ch_basic.get("Total_videos", 0)),
+                    datetime.now(),
+                ))
+                ensure_warehouse_version(cur)
+                bump_warehouse_version(cur)
+            conn.commit()
+            report.success("✅ Basic Channel Data stored in PostgreSQL")
+        except Exception as e:
+            conn.rollback()
+            report.error(f"❌ Direct PostgreSQL store failed: {e}")
+
+
+# ---- Join / filter / sort columns used by the analyzer queries ---- #
+WAREHOUSE_INDEXES = {
+    "idx_playlist_channel":    "channel_playlist (channel_id)",
+    "idx_videos_channel":      "channel_videos (channel_id)",
+    "idx_videos_playlist":     "channel_videos (playlist_id)",
+    "idx_videos_published":    "channel_videos (published_date)",
+    "idx_videos_views":        "channel_videos (view_count DESC)",
+    "idx_videos_likes":        "channel_videos (like_count DESC)",
+    "idx_videos_comments":     "channel_videos (comments_count DESC)",
+    "idx_comments_video":      "channel_comments (video_id)",
+    "idx_comments_channel":    "channel_comments (channel_id)",
+    "idx_video_playlist_pl":   "video_playlist (playlist_id)",
+    "idx_video_playlist_ch":   "video_playlist (channel_id)",
+    "idx_channel_total_videos": "channel_table (total_videos DESC)",
+    "idx_channel_views":       "channel_table (channel_views DESC)",
+}
+
+# ---- Materialized views behind the YT Channel Analyzer ---- #
+# The analyzer reads these instead of joining / aggregating the raw tables;
+# they are refreshed CONCURRENTLY (readers are never blocked) after every
+# migration. Each needs a unique index for concurrent refresh.
+ANALYZER_VIEWS = {
+    # One row per video with its channel — Q1, Q3, Q4, Q5, Q6, Q10
+    "mv_video_stats": ("""
+        SELECT v.video_id, v.channel_id, ch.channel_name, v.video_name,
+               v.view_count, v.like_count, v.dislike_count, v.comments_count
+        FROM channel_videos v
+        LEFT JOIN channel_table ch ON v.channel_id = ch.channel_id
+    """, [
+        "UNIQUE (video_id)",
+        "(channel_name, video_id)",
+        "(view_count DESC)",
+        "(like_count DESC, video_id DESC)",
+        "(comments_count DESC, video_id DESC)",
+    ]),
+    # Videos / views per channel per publishing year — Q8
+    "mv_channel_year_stats": ("""
+        SELECT ch.channel_id, ch.channel_name,
+               EXTRACT(YEAR FROM v.published_date)::INT AS year,
+               COUNT(v.video_id)  AS videos,
+               SUM(v.view_count)  AS total_views
+        FROM channel_videos v
+        JOIN channel_table ch ON v.channel_id = ch.channel_id
+        WHERE v.published_date IS NOT NULL
+        GROUP BY ch.channel_id, ch.channel_name, year
+    """, [
+        "UNIQUE (channel_id, year)",
+        "(year, videos DESC)",
+    ]),
+    # Average video duration per channel — Q9
+    "mv_channel_durations": ("""
+        SELECT ch.channel_id, ch.channel_name,
+               TO_CHAR(AVG(v.duration::interval), 'HH24:MI:SS') AS avg_duration
+        FROM channel_videos v
+        JOIN channel_table ch ON v.channel_id = ch.channel_id
+        GROUP BY ch.channel_id, ch.channel_name
+    """, [
+        "UNIQUE (channel_id)",
+        "(channel_name)",
+    ]),
+}
+
+def create_analyzer_views(cur):
+    for view, (definition, indexes) in ANALYZER_VIEWS.items():
+        cur.execute(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {view} AS {definition};")
+        for idx, columns in enumerate(indexes):
+            unique = columns.startswith("UNIQUE ")
+            columns = columns.removeprefix("UNIQUE ")
+            cur.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {view}_idx{idx} "
+                        f"ON {view} {columns};")
+
+def refresh_analyzer_views(conn):
+    """Refresh every analyzer view without blocking readers and bump the
+    warehouse version; returns seconds taken."""
+    started = time.perf_counter()
+    with conn.cursor() as cur:
+        for view in ANALYZER_VIEWS:
+            cur.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view};")
+        bump_warehouse_version(cur)
+    conn.commit()
+    return time.perf_counter() - started
+
+def create_postgresql_tables(conn):
+    """
+    Create the normalised tables, the video_playlist bridge, the migration
+    state table, the analyzer indexes and the analyzer materialized views if
+    they do not already exist.
+    Tables created by older versions get their channel_id columns added and
+    backfilled through the playlist (videos) and video (comments) joins.
+    """
+    report = get_reporter()
+    with report.spinner("🔧 Creating PostgreSQL tables..."):
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS channel_table (
+                        channel_id    VARCHAR(50) PRIMARY KEY,
+                        channel_name  VARCHAR(255),
+                        subscribers   BIGINT,
+                        channel_views BIGINT,
+                        total_videos  BIGINT,
+                        harvested_time TIMESTAMP
+                    );
+                """)
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS channel_playlist (
+                        playlist_id    VARCHAR(255) PRIMARY KEY,
+                        playlist_name  VARCHAR(255),
+                        channel_name   VARCHAR(255),
+                        channel_id     VARCHAR(255),
+                        description    TEXT,
+                        item_count     INT,
+                        privacy_status VARCHAR(50),
+                        published_at   TIMESTAMP,
+                        harvested_at   TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    );
+                """)
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS channel_videos (
+                        video_id          VARCHAR(50) PRIMARY KEY,
+                        channel_id        VARCHAR(50),
+                        playlist_id       VARCHAR(50),
+                        video_name        VARCHAR(500),
+                        video_description TEXT,
+                        published_date    TIMESTAMP,
+                        category_id       INT,
+                        duration          TIME,
+                        video_quality     VARCHAR(20),
+                        licensed          VARCHAR(10),
+                        view_count        BIGINT,
+                        like_count        INT,
+                        dislike_count     INT,
+                        favorite_count    INT,
+                        comments_count    INT,
+                        thumbnail         VARCHAR(500),
+                        caption_status    VARCHAR(150)
+                    );
+                """)
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS channel_comments (
+                        comment_id      VARCHAR(50) PRIMARY KEY,
+                        video_id        VARCHAR(50),
+                        channel_id      VARCHAR(50),
+                        channel_name    VARCHAR(255),
+                        comment_text    TEXT,
+                        comment_date    TIMESTAMP,
+                        comment_author  VARCHAR(255),
+                        comment_like    INT     DEFAULT 0,
+                        reply_count     INT     DEFAULT 0,
+                        is_pinned       BOOLEAN DEFAULT FALSE,
+                        is_hearted      BOOLEAN DEFAULT FALSE,
+                        language        VARCHAR(10),
+                        sentiment_score FLOAT,
+                        harvested_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    );
+                """)
+                cur.execute("""
+                    SELECT table_name FROM information_schema.columns
+                    WHERE table_schema = current_schema() AND column_name = 'channel_id'
+                      AND table_name IN ('channel_videos', 'channel_comments');
+                """)
+                has_channel_id = {row[0] for row in cur.fetchall()}
+                cur.execute("ALTER TABLE channel_videos   ADD COLUMN IF NOT EXISTS channel_id VARCHAR(50);")
+                cur.execute("ALTER TABLE channel_comments ADD COLUMN IF NOT EXISTS channel_id VARCHAR(50);")
+                # One-time backfill of the new columns from the playlist join older versions used
+                if "channel_videos" not in has_channel_id:
+                    cur.execute("""
+                        UPDATE channel_videos v SET channel_id = p.channel_id
+                        FROM channel_playlist p
+                        WHERE v.channel_id IS NULL AND v.playlist_id = p.playlist_id;
+                    """)
+                if "channel_comments" not in has_channel_id:
+                    cur.execute("""
+                        UPDATE channel_comments c SET channel_id = v.channel_id
+                        FROM channel_videos v
+                        WHERE c.channel_id IS NULL AND c.video_id = v.video_id;
+                    """)
+                # Many-to-many playlist membership (channel_videos.playlist_id keeps only one)
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS video_playlist (
+                        video_id    VARCHAR(50),
+                        playlist_id VARCHAR(255),
+                        channel_id  VARCHAR(50),
+                        PRIMARY KEY (video_id, playlist_id)
+                    );
+                """)
+                for index, target in WAREHOUSE_INDEXES.items():
+                    cur.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {target};")
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS migration_checkpoints (
+                        channel_id  VARCHAR(50),
+                        table_name  VARCHAR(63),
+                        last_id     VARCHAR(24),
+                        rows_done   BIGINT DEFAULT 0,
+                        completed   BOOLEAN DEFAULT FALSE,
+                        harvested_at VARCHAR(64),
+                        updated_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (channel_id, table_name)
+                    );
+                """)
+                cur.execute("ALTER TABLE migration_checkpoints ADD COLUMN IF NOT EXISTS harvested_at VARCHAR(64);")
+                create_analyzer_views(cur)
+                ensure_warehouse_version(cur)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            report.error(f"❌ Table creation failed: {e}")
+
+# ============================================================
+# Bulk Loading
+# "copy"   — COPY FROM STDIN into a temporary staging table, then one
+#            INSERT … SELECT … ON CONFLICT into the real table (fastest).
+# "insert" — execute_values multi-row INSERT … ON CONFLICT.
+# Existing rows are only rewritten when a value actually changed (IS
+# DISTINCT FROM guard), so re-migrations refresh view / like / comment
+# counts without dead tuples or WAL for unchanged rows.
+# ============================================================
+PG_LOAD_ENGINES = ("copy", "insert")
+PG_LOAD_ENGINE = "copy"      # default engine for migrate_to_postgresql()
+PG_VOLATILE_COLUMNS = ("harvested_at",)   # set on every run — ignored for change detection
+
+def copy_field(value):
+    """One CSV field for COPY: NULL as \\N, everything else quoted."""
+    if value is None:
+        return r"\N"
+    return '"' + str(value).replace('"', '""') + '"'
+
+def key_columns(key):
+    """A conflict key is one column name or a tuple of them."""
+    return (key,) if isinstance(key, str) else tuple(key)
+
+def upsert_clause(table, columns, key):
+    """ON CONFLICT (key) DO UPDATE … WHERE the row's compared columns changed."""
+    keys     = key_columns(key)
+    updated  = [c for c in columns if c not in keys]
+    compared = [c for c in updated if c not in PG_VOLATILE_COLUMNS]
+    return sql.SQL("ON CONFLICT ({key}) DO UPDATE SET {sets} WHERE ({old}) IS DISTINCT FROM ({new})").format(
+        key=sql.SQL(", ").join(map(sql.Identifier, keys)),
+        sets=sql.SQL(", ").join(
+            sql.SQL("{c} = EXCLUDED.{c}").format(c=sql.Identifier(c)) for c in updated
+        ),
+        old=sql.SQL(", ").join(sql.Identifier(table, c) for c in compared),
+        new=sql.SQL(", ").join(sql.Identifier("excluded", c) for c in compared),
+    )
+
+def load_rows(conn, table, columns, key, rows, engine=None):
+    """
+    Upsert `rows` (tuples in `columns` order) into `table` on `key`; existing
+    rows are only updated when a value changed. Returns
+    (rows_sent, rows_written, seconds) — written counts inserts plus real updates.
+    """
+    engine = engine or PG_LOAD_ENGINE
+    if engine not in PG_LOAD_ENGINES:
+        raise ValueError(f"Unknown load engine {engine!r} (expected one of {PG_LOAD_ENGINES})")
+    if not rows:
+        return 0, 0, 0.0
+    started = time.perf_counter()
+    cols = sql.SQL(", ").join(map(sql.Identifier, columns))
+    on_conflict = upsert_clause(table, columns, key)
+    with conn.cursor() as cur:
+        if engine == "insert":
+            execute_values(cur, sql.SQL("INSERT INTO {} ({}) VALUES %s {}").format(
+                sql.Identifier(table), cols, on_conflict).as_string(cur), rows, page_size=len(rows))
+        else:
+            stage = sql.Identifier(f"stage_{table}")
+            cur.execute(sql.SQL(
+                "CREATE TEMP TABLE IF NOT EXISTS {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP"
+            ).format(stage, sql.Identifier(table)))
+            cur.execute(sql.SQL("TRUNCATE {}").format(stage))
+            buffer = io.StringIO()
+            for row in rows:
+                buffer.write(",".join(map(copy_field, row)))
+                buffer.write("\n")
+            buffer.seek(0)
+            cur.copy_expert(sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv, NULL '\\N')").format(
+                stage, cols).as_string(cur), buffer)
+            # DISTINCT ON — DO UPDATE can't touch the same row twice in one statement
+            cur.execute(sql.SQL("INSERT INTO {} ({}) SELECT DISTINCT ON ({}) {} FROM {} {}").format(
+                sql.Identifier(table), cols, sql.SQL(", ").join(map(sql.Identifier, key_columns(key))),
+                cols, stage, on_conflict))
+        written = cur.rowcount
+    return len(rows), written, time.perf_counter() - started
+
+def report_load_rate(report, table, count, seconds, written=None):
+    rate = count / max(seconds, 1e-9)
+    changed = f", {written:,} inserted/changed" if written is not None else ""
+    report.info(f"⚡ {table}: {count:,} rows in {seconds:.2f}s ({rate:,.0f} rows/s{changed})")
+    report.counts(**{f"{table}_rows_per_s": round(rate)})
+
+# ============================================================
+# MongoDB → PostgreSQL Migration
+# Each collection is read through a cursor with a projection of just the
+# fields the warehouse keeps, in _id order, converted to rows and written
+# MIGRATE_CHUNK rows at a time — memory stays flat however large the
+# channel is. Every chunk is committed together with a per-table checkpoint
+# (last MongoDB _id) in migration_checkpoints, so a failed or interrupted
+# migration resumes after the last committed chunk instead of starting over.
+# ============================================================
+MIGRATE_CHUNK = 5000          # rows per load_rows() call and per commit
+MONGO_CURSOR_BATCH = 2000     # documents per MongoDB getMore
+
+PLAYLIST_COLUMNS = [
+    "playlist_id", "playlist_name", "channel_name", "channel_id", "description",
+    "item_count", "privacy_status", "published_at", "harvested_at",
+]
+PLAYLIST_FIELDS = ["playlist_id", "playlist_name", "playlist_title", "channel_id", "description",
+                   "item_count", "privacy_status", "published_at"]
+
+VIDEO_COLUMNS = [
+    "video_id", "channel_id", "playlist_id", "video_name", "video_description", "published_date",
+    "category_id", "duration", "video_quality", "licensed", "view_count", "like_count",
+    "dislike_count", "favorite_count", "comments_count", "thumbnail", "caption_status",
+]
+VIDEO_FIELDS = ["video_id", "playlist_id", "video_title", "description", "published_at", "category_id",
+                "duration", "definition", "licensed_content", "view_count", "like_count",
+                "dislike_count", "favorite_count", "comment_count", "thumbnail", "caption_status"]
+
+COMMENT_COLUMNS = [
+    "comment_id", "video_id", "channel_id", "channel_name", "comment_text", "comment_date",
+    "comment_author", "comment_like", "reply_count", "is_pinned", "is_hearted",
+    "language", "sentiment_score", "harvested_at",
+]
+VIDEO_PLAYLIST_COLUMNS = ["video_id", "playlist_id", "channel_id"]
+VIDEO_PLAYLIST_FIELDS = ["video_id", "playlist_id", "playlist_ids"]
+
+COMMENT_FIELDS = ["comment_id", "video_id", "comment_text", "comment_date", "author", "like_count",
+                  "reply_count", "is_pinned", "is_hearted", "language", "sentiment_score"]
+
+def playlist_row(p, channel_name, channel_id):
+    return (
+        p.get("playlist_id"),
+        p.get("playlist_name") or p.get("playlist_title"),
+        channel_name,
+        p.get("channel_id") or channel_id,
+        p.get("description", ""),
+        int(p.get("item_count", 0)),
+        p.get("privacy_status", ""),
+        p.get("published_at"),
+        datetime.now(),
+    )
+
+def video_row(v, channel_id):
+    return (
+        v.get("video_id"),
+        channel_id,
+        v.get("playlist_id"),
+        v.get("video_title"),
+        v.get("description", ""),
+        v.get("published_at"),
+        int(v.get("category_id", 0)),
+        parse_duration_to_hms(v.get("duration")),
+        v.get("definition", "hd"),
+        v.get("licensed_content", "No"),
+        int(v.get("view_count", 0)),
+        int(v.get("like_count", 0)),
+        int(v.get("dislike_count", 0)),
+        int(v.get("favorite_count", 0)),
+        int(v.get("comment_count", 0)),
+        v.get("thumbnail", ""),
+        v.get("caption_status", "Unknown"),
+    )
+
+def video_playlist_rows(v, channel_id):
+    # playlist_ids holds every named playlist; older documents only have playlist_id
+    playlist_ids = v.get("playlist_ids") or ([v["playlist_id"]] if v.get("playlist_id") else [])
+    # dict.fromkeys: documents stored before membership was deduplicated may repeat an id
+    return [(v.get("video_id"), pid, channel_id) for pid in dict.fromkeys(playlist_ids)]
+
+def comment_row(c, channel_id, channel_name):
+    # language / sentiment_score were precomputed by enrich_comments()
+    return (
+        c.get("comment_id"),
+        c.get("video_id"),
+        channel_id,
+        channel_name,
+        c.get("comment_text", "") or "",
+        c.get("comment_date"),
+        c.get("author"),
+        int(c.get("like_count", 0)),
+        int(c.get("reply_count", 0)),
+        bool(c.get("is_pinned", False)),
+        bool(c.get("is_hearted", False)),
+        c.get("language"),
+        c.get("sentiment_score"),
+        datetime.now(),
+    )
+
+# ---- Checkpoints ---- #
+def get_checkpoint(conn, channel_id, table):
+    """(last_id, rows_done, completed) for a table's unfinished migration, or None."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT last_id, rows_done, completed FROM migration_checkpoints
+            WHERE channel_id = %s AND table_name = %s
+        """, (channel_id, table))
+        return cur.fetchone()
+
+def save_checkpoint(conn, channel_id, table, last_id, rows_done, completed=False, harvested_at=None):
+    """Record progress — call inside the chunk's transaction, before commit.
+    harvested_at is the Harvested_at of the MongoDB data being migrated."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO migration_checkpoints
+                (channel_id, table_name, last_id, rows_done, completed, harvested_at, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (channel_id, table_name) DO UPDATE SET
+                last_id      = EXCLUDED.last_id,
+                rows_done    = EXCLUDED.rows_done,
+                completed    = EXCLUDED.completed,
+                harvested_at = EXCLUDED.harvested_at,
+                updated_at   = EXCLUDED.updated_at;
+        """, (channel_id, table, last_id, rows_done, completed, harvested_at, datetime.now()))
+
+def drop_stale_checkpoints(conn, channel_id, harvested_at):
+    """Forget checkpoints left by a migration of an earlier harvest — the
+    channel was re-harvested since, so every table must be migrated again."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            DELETE FROM migration_checkpoints
+            WHERE channel_id = %s AND harvested_at IS DISTINCT FROM %s
+        """, (channel_id, harvested_at))
+        dropped = cur.rowcount
+    conn.commit()
+    return dropped
+
+def clear_checkpoints(conn, channel_id):
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM migration_checkpoints WHERE channel_id = %s", (channel_id,))
+    conn.commit()
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+def migrate_collection(conn, channel_id, collection, fields, to_row, table, columns, key,
+                       engine=None, chunk_size=MIGRATE_CHUNK, progress_range=(0.0, 1.0), expand=False,
+                       harvested_at=None):
+    """
+    Stream a channel's documents from one MongoDB collection into `table`,
+    committing every `chunk_size` documents with a checkpoint. With
+    expand=True, to_row returns a list of rows per document. Returns the rows
+    written for this channel, including those from an earlier interrupted run.
+    """
+    report = get_reporter()
+    query = {"channel_id": channel_id}
+    checkpoint = get_checkpoint(conn, channel_id, table)
+    loaded = 0
+    if checkpoint:
+        last_id, loaded, completed = checkpoint
+        if completed:
+            report.info(f"⏭️ {table}: already migrated ({loaded:,} rows) — skipping.")
+            return loaded
+        if last_id:
+            report.info(f"↩️ {table}: resuming after {loaded:,} committed rows.")
+            query["_id"] = {"$gt": ObjectId(last_id)}
+
+    total = loaded + collection.count_documents(query)
+    lo, hi = progress_range
+    load_secs, fresh, written = 0.0, 0, 0
+    cursor = (collection.find(query, dict.fromkeys(fields, 1))
+                        .sort("_id", 1)
+                        .batch_size(MONGO_CURSOR_BATCH))
+    for docs in chunked(cursor, chunk_size):
+        rows = [r for d in docs for r in to_row(d)] if expand else [to_row(d) for d in docs]
+        n, w, secs = load_rows(conn, table, columns, key, rows, engine)
+        loaded += n
+        fresh += n
+        written += w
+        load_secs += secs
+        save_checkpoint(conn, channel_id, table, str(docs[-1]["_id"]), loaded, harvested_at=harvested_at)
+        if w:
+            with conn.cursor() as cur:
+                bump_warehouse_version(cur)     # committed data changed — invalidate cached results
+        conn.commit()
+        report.progress(lo + (hi - lo) * min(loaded / max(total, 1), 1.0), f"{table}: {loaded:,}/{total:,}")
+    save_checkpoint(conn, channel_id, table, None, loaded, completed=True, harvested_at=harvested_at)
+    conn.commit()
+    if fresh:
+        report_load_rate(report, table, fresh, load_secs, written)
+    elif not loaded:
+        report.info(f"No rows to migrate into {table}.")
+    return loaded
+
+def migrate_to_postgresql(conn, channel_id, mg_yth_db, engine=None, chunk_size=MIGRATE_CHUNK):
+    """Migrate a harvested channel (by channel_id) from MongoDB to PostgreSQL.
+    `engine` picks the bulk loader ("copy" / "insert", default PG_LOAD_ENGINE);
+    rows are committed every `chunk_size` rows and an interrupted migration
+    resumes from its checkpoints, unless the channel was re-harvested since. Returns {"videos": n, "comments": n} on
+    success, None on failure.
+    """
+    report = get_reporter()
+    try:
+        report.progress(0, "📤 Starting migration...")
+        create_postgresql_tables(conn)
+
+        # ------ Fetch from MongoDB ------ #
+        meta = mg_yth_db[CHANNELS_COL].find_one({"channel_id": channel_id}, {"_id": 0})
+        if not meta:
+            report.error(f"⚠️ No meta data found for: {channel_id}")
+            return
+
+        # ---- Validate required fields before any DB write ---- #
+        channel_id_val   = meta.get("Channel_Id")
+        channel_name_val = meta.get("Channel_name")
+        subscribers_val  = meta.get("Subscribers")
+        if not all([channel_id_val, channel_name_val, subscribers_val is not None]):
+            report.error("❌ Missing essential metadata fields (Channel_Id / Channel_name / Subscribers). Aborting.")
+            return
+
+        # Checkpoints only resume a migration of the same harvest
+        harvested_at = meta.get("Harvested_at")
+        if drop_stale_checkpoints(conn, channel_id, harvested_at):
+            report.info("♻️ Channel was re-harvested since the interrupted migration — starting over.")
+
+        # NLP enrichment stage — only new / edited comments are scored
+        ensure_mongo_indexes(mg_yth_db)
+        enrich_comments(mg_yth_db, channel_id)
+
+        # ---- Insert channel row ---- #
+        report.progress(0.2, "📦 Inserting channel metadata...")
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO channel_table
+                    (channel_id, channel_name, subscribers, channel_views, total_videos, harvested_time)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON CONFLICT (channel_id) DO UPDATE SET
+                    channel_name   = EXCLUDED.channel_name,
+                    subscribers    = EXCLUDED.subscribers,
+                    channel_views  = EXCLUDED.channel_views,
+                    total_videos   = EXCLUDED.total_videos,
+                    harvested_time = EXCLUDED.harvested_time;
+            """, (
+                channel_id_val,
+                channel_name_val,
+                int(subscribers_val),
+                int(meta.get("Views", 0)),
+                int(meta.get("Total_videos", 0)),
+                datetime.now(),
+            ))
+            bump_warehouse_version(cur)
+        conn.commit()
+
+        # ---- Insert playlists ---- #
+        report.progress(0.3, "🎞 Inserting playlist records...")
+        n_playlists = migrate_collection(
+            conn, channel_id, mg_yth_db[PLAYLISTS_COL], PLAYLIST_FIELDS,
+            lambda p: playlist_row(p, channel_name_val, channel_id_val),
+            "channel_playlist", PLAYLIST_COLUMNS, "playlist_id", engine, chunk_size, (0.3, 0.35),
+            harvested_at=harvested_at,
+        )
+        report.counts(playlists=n_playlists)
+
+        # ---- Insert videos ---- #
+        report.progress(0.35, "🎞 Inserting video records...")
+        n_videos = migrate_collection(
+            conn, channel_id, mg_yth_db[VIDEOS_COL], VIDEO_FIELDS,
+            lambda v: video_row(v, channel_id_val),
+            "channel_videos", VIDEO_COLUMNS, "video_id", engine, chunk_size, (0.35, 0.45),
+            harvested_at=harvested_at,
+        )
+        report.counts(videos=n_videos)
+
+        # ---- Playlist membership bridge ---- #
+        # Rebuilt from scratch on a fresh run so videos that left a playlist drop out
+        if not get_checkpoint(conn, channel_id, "video_playlist"):
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM video_playlist WHERE channel_id = %s", (channel_id_val,))
+                bump_warehouse_version(cur)
+        migrate_collection(
+            conn, channel_id, mg_yth_db[VIDEOS_COL], VIDEO_PLAYLIST_FIELDS,
+            lambda v: video_playlist_rows(v, channel_id_val),
+            "video_playlist", VIDEO_PLAYLIST_COLUMNS, ("video_id", "playlist_id"), engine, chunk_size,
+            (0.45, 0.5), expand=True, harvested_at=harvested_at,
+        )
+
+        # ---- Insert comments ---- #
+        report.progress(0.5, "💬 Inserting comment records...")
+        n_comments = migrate_collection(
+            conn, channel_id, mg_yth_db[COMMENTS_COL], COMMENT_FIELDS,
+            lambda c: comment_row(c, channel_id_val, channel_name_val),
+            "channel_comments", COMMENT_COLUMNS, "comment_id", engine, chunk_size, (0.5, 0.98),
+            harvested_at=harvested_at,
+        )
+        report.counts(comments=n_comments)
+
+        # Finished — the next migration of this channel starts from the beginning
+        clear_checkpoints(conn, channel_id)
+
+        report.progress(0.99, "📊 Refreshing analyzer views...")
+        report.info(f"📊 Analyzer views refreshed in {refresh_analyzer_views(conn):.2f}s.")
+        report.progress(1.0, "✅ Migration complete!")
+        report.success(f"✅ Channel '{channel_name_val}' migrated to PostgreSQL")
+        report.info(f"📦 {n_videos} videos · {n_comments} comments migrated.")
+        return {"videos": n_videos, "comments": n_comments}
+
+    except Exception as e:
+        conn.rollback()
+        report.error(f"❌ Migration failed: {e}")
+        traceback.print_exc()
@@ -0,0 +1,79 @@
+# ----- Import Basic Packages ----- #
+import sys
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# ============================================================
+# Pipeline Reporting
+# The harvesting / migration core never talks to a UI directly. It reports
+# messages, progress and quota usage to the *current* reporter, held in a
+# ContextVar so that every Streamlit session, CLI worker or background job
+# sees its own reporter — including inside worker-pool threads started with
+# submit_in_context().
+# ============================================================
+class Reporter:
+    """Console reporter — the default when no UI is attached."""
+
+    def __init__(self, prefix="", verbose=True):
+        self.prefix = f"[{prefix}] " if prefix else ""
+        self.verbose = verbose
+        self.quota_used = 0
+        self._lock = threading.Lock()
+
+    def _emit(self, level, message):
+        print(f"{self.prefix}{level:<7} {message}", file=sys.stderr, flush=True)
+
+    def info(self, message):
+        if self.verbose:
+            self._emit("INFO", message)
+
+    def success(self, message):
+        if self.verbose:
+            self._emit("OK", message)
+
+    def warning(self, message):
+        self._emit("WARNING", message)
+
+    def error(self, message):
+        self._emit("ERROR", message)
+
+    def progress(self, fraction, text=""):
+        """Overall progress of the current operation, 0.0 – 1.0."""
+        if self.verbose:
+            self._emit("PROGRESS", f"{fraction:5.0%} {text}")
+
+    @contextmanager
+    def spinner(self, text):
+        if self.verbose:
+            self._emit("...", text)
+        yield
+
+    def counts(self, **counts):
+        """Per-stage item counts, e.g. counts(videos=120, comments=2400)."""
+        if self.verbose:
+            self._emit("COUNTS", ", ".join(f"{k}={v:,}" for k, v in counts.items()))
+
+    def quota(self, units):
+        """Called once per successful API call with the units it cost."""
+        with self._lock:
+            self.quota_used += units
+
+
+_current_reporter = contextvars.ContextVar("reporter", default=Reporter())
+
+def get_reporter():
+    return _current_reporter.get()
+
+@contextmanager
+def use_reporter(reporter):
+    """Route all pipeline reporting inside the block to reporter."""
+    token = _current_reporter.set(reporter)
+    try:
+        yield reporter
+    finally:
+        _current_reporter.reset(token)
+
+def submit_in_context(pool, fn, *args, **kwargs):
+    """pool.submit() that carries the caller's reporter into the worker thread."""
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
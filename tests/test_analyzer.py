@@ -0,0 +1,182 @@
+from contextlib import contextmanager
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+analyzer = pytest.importorskip("analyzer")
+
+
+class FakeCursor:
+    def __init__(self, conn, name):
+        self.conn = conn
+        self.name = name
+        self.description = [(c,) for c in conn.column_names]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.conn.executed.append((self.name, query, params))
+
+    def fetchmany(self, size):
+        return self.conn.rows[:size]
+
+    def fetchall(self):
+        return list(self.conn.rows)
+
+
+class FakeConnection:
+    def __init__(self, column_names, rows):
+        self.column_names = column_names
+        self.rows = rows
+        self.executed = []
+
+    def cursor(self, name=None):
+        return FakeCursor(self, name)
+
+    def rollback(self):
+        pass
+
+
+class FakePool:
+    """Stands in for PostgresPool: hands out one scripted connection."""
+    maxconn = 2
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    @contextmanager
+    def connection(self):
+        yield self.conn
+
+
+VIEWS_SPEC = {
+    "sql":     "SELECT channel_name, channel_views FROM channel_table",
+    "columns": ["Channel Name", "Total Views"],
+}
+VIEWS_ROWS = [("x", 10), ("y", 5)]
+
+COMMENTS_SPEC = {
+    "sql":       "SELECT video_name, comments_count, video_id FROM mv_video_stats",
+    "columns":   ["Video Name", "Comment Count"],
+    "index_col": "Video Name",
+    "keyset":    ("comments_count", "video_id"),
+    "order":     "DESC",
+}
+COMMENT_ROWS = [("a", 9, "v9"), ("b", 7, "v7"), ("c", 7, "v3"), ("d", 1, "v1")]
+
+
+# ---- Result cache ---- #
+def frame(n):
+    return pd.DataFrame({"x": range(n)})
+
+
+def size_of(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def test_query_cache_evicts_least_recently_used():
+    cache = analyzer.QueryCache(max_bytes=2 * size_of(frame(10)))
+    cache.put("a", frame(10))
+    cache.put("b", frame(10))
+    assert cache.get("a") is not None       # "a" is now the most recently used
+    cache.put("c", frame(10))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_query_cache_skips_oversized_results_and_counts_hits():
+    cache = analyzer.QueryCache(max_bytes=size_of(frame(10)))
+    cache.put("big", frame(1000))
+    assert cache.get("big") is None
+    cache.put("small", frame(10))
+    cache.get("small")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_run_queries_serves_repeats_from_cache(monkeypatch):
+    monkeypatch.setattr(analyzer, "get_warehouse_version", lambda conn: 7)
+    conn = FakeConnection(["channel_name", "channel_views"], VIEWS_ROWS)
+    pool, cache = FakePool(conn), analyzer.QueryCache()
+
+    first = analyzer.run_queries(pool, {"q7": VIEWS_SPEC}, cache=cache)["q7"]
+    again = analyzer.run_queries(pool, {"q7": VIEWS_SPEC}, cache=cache)["q7"]
+
+    assert (first[2], first[3]) == (None, False)
+    assert again[3] is True and again[0] is first[0]
+    assert len(conn.executed) == 1
+
+
+def test_warehouse_version_change_misses_cache(monkeypatch):
+    versions = iter([1, 2])
+    monkeypatch.setattr(analyzer, "get_warehouse_version", lambda conn: next(versions))
+    monkeypatch.setattr(analyzer, "WAREHOUSE_VERSION_TTL", -1)
+    conn = FakeConnection(["channel_name", "channel_views"], VIEWS_ROWS)
+    pool, cache = FakePool(conn), analyzer.QueryCache()
+
+    analyzer.run_queries(pool, {"q7": VIEWS_SPEC}, cache=cache)
+    result = analyzer.run_queries(pool, {"q7": VIEWS_SPEC}, cache=cache)["q7"]
+    assert result[3] is False
+    assert len(conn.executed) == 2
+
+
+# ---- Keyset pages ---- #
+def test_run_page_first_page_and_next_key():
+    conn = FakeConnection(["video_name", "comments_count", "video_id"], COMMENT_ROWS)
+    df, _ = analyzer.run_page(FakePool(conn), COMMENTS_SPEC, page_size=3)
+
+    name, query, params = conn.executed[0]
+    assert name                       # a named, server-side cursor
+    assert "WHERE" not in query
+    assert query.endswith("ORDER BY comments_count DESC, video_id DESC")
+    assert params is None
+    assert list(df.index) == ["a", "b", "c"]
+    assert list(df.columns) == ["Comment Count"]
+    assert df.attrs["next_after"] == (7, "v3")
+
+
+def test_run_page_after_key_and_last_page():
+    conn = FakeConnection(["video_name", "comments_count", "video_id"], COMMENT_ROWS[3:])
+    df, _ = analyzer.run_page(FakePool(conn), COMMENTS_SPEC, after=(7, "v3"), page_size=3)
+
+    _, query, params = conn.executed[0]
+    assert "WHERE (comments_count, video_id) < (%s, %s)" in query
+    assert params == (7, "v3")
+    assert list(df.index) == ["d"]
+    assert df.attrs["next_after"] is None
+
+
+def test_run_page_ascending_keyset():
+    spec = {"sql": "SELECT channel_name, video_name, video_id FROM mv_video_stats",
+            "columns": ["Channel Name", "Video Title"], "keyset": ("channel_name", "video_id")}
+    conn = FakeConnection(["channel_name", "video_name", "video_id"], [("x", "t1", "v1"), ("x", "t2", "v2")])
+    df, _ = analyzer.run_page(FakePool(conn), spec, after=("w", "v0"), page_size=1)
+
+    _, query, _ = conn.executed[0]
+    assert "WHERE (channel_name, video_id) > (%s, %s)" in query
+    assert query.endswith("ORDER BY channel_name ASC, video_id ASC")
+    assert df.attrs["next_after"] == ("x", "v1")
+
+
+def test_run_queries_caches_each_page_separately(monkeypatch):
+    monkeypatch.setattr(analyzer, "get_warehouse_version", lambda conn: 7)
+    conn = FakeConnection(["video_name", "comments_count", "video_id"], COMMENT_ROWS)
+    pool, cache = FakePool(conn), analyzer.QueryCache()
+
+    analyzer.run_queries(pool, {"q4": COMMENTS_SPEC}, cache=cache)
+    again = analyzer.run_queries(pool, {"q4": COMMENTS_SPEC}, cache=cache)["q4"]
+    other = analyzer.run_queries(pool, {"q4": {**COMMENTS_SPEC, "after": (7, "v3")}}, cache=cache)["q4"]
+
+    assert again[3] is True
+    assert other[3] is False
+    assert len(conn.executed) == 2
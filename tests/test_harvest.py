@@ -0,0 +1,162 @@
+import pytest
+
+harvest = pytest.importorskip("harvest")
+
+
+# ---- Quota estimates ---- #
+def test_estimate_refresh_floor_covers_listings_and_video_stats():
+    stats = {"Total_videos": 120}
+    playlists = [{"item_count": 60}, {"item_count": 10}]
+    estimate = harvest.estimate_harvest_cost(stats, playlists)
+
+    # channels + 1 playlists page + 1 uploads page + 3 videos().list calls
+    assert estimate["units_refresh"] == 1 + 1 + 1 + 3
+    assert 0 < estimate["units_refresh"] < estimate["units_min"]
+
+
+# ---- In-memory MongoDB stand-ins ---- #
+class FakeBulkResult:
+    def __init__(self, upserted, modified, matched):
+        self.upserted_count = upserted
+        self.modified_count = modified
+        self.matched_count = matched
+
+
+class FakeCursor(list):
+    def batch_size(self, n):
+        return self
+
+
+def matches(doc, query):
+    for field, cond in (query or {}).items():
+        value = doc.get(field)
+        if isinstance(cond, dict):
+            if "$in" in cond and value not in cond["$in"]:
+                return False
+            if "$nin" in cond and value in cond["$nin"]:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = [dict(d) for d in docs]
+        self.bulk_writes = 0
+
+    def find(self, query=None, projection=None):
+        return FakeCursor(dict(d) for d in self.docs if matches(d, query))
+
+    def find_one(self, query=None, projection=None):
+        return next(iter(self.find(query)), None)
+
+    def distinct(self, field, query=None):
+        return list(dict.fromkeys(d.get(field) for d in self.docs if matches(d, query)))
+
+    def bulk_write(self, ops, ordered=True):
+        self.bulk_writes += 1
+        upserted = modified = matched = 0
+        for op in ops:
+            new = op._doc["$set"]
+            stored = next((d for d in self.docs if matches(d, op._filter)), None)
+            if stored is None:
+                self.docs.append(dict(new))
+                upserted += 1
+                continue
+            matched += 1
+            if any(stored.get(k) != v for k, v in new.items()):
+                stored.update(new)
+                modified += 1
+        return FakeBulkResult(upserted, modified, matched)
+
+    def delete_many(self, query):
+        self.docs = [d for d in self.docs if not matches(d, query)]
+
+    def replace_one(self, query, doc, upsert=False):
+        self.delete_many(query)
+        self.docs.append(dict(doc))
+
+    def insert_one(self, doc):
+        self.docs.append(dict(doc))
+
+    def create_index(self, *args, **kwargs):
+        pass
+
+
+class FakeDB(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+
+# ---- Content hashes and upserts ---- #
+def test_content_hash_ignores_volatile_fields():
+    doc = {"playlist_id": "p1", "item_count": 3, "harvested_at": "2024-01-01T00:00:00"}
+    later = {**doc, "harvested_at": "2024-06-01T00:00:00"}
+    assert harvest.content_hash(doc) == harvest.content_hash(later)
+    assert harvest.content_hash(doc) != harvest.content_hash({**doc, "item_count": 4})
+
+
+def test_upsert_docs_skips_unchanged_and_updates_changed():
+    col = FakeCollection()
+    first = harvest.upsert_docs(col, [{"video_id": "v1", "view_count": 1},
+                                      {"video_id": "v2", "view_count": 5}], "video_id")
+    assert first == {"inserted": 2, "updated": 0, "unchanged": 0}
+
+    writes = col.bulk_writes
+    same = harvest.upsert_docs(col, [{"video_id": "v1", "view_count": 1}], "video_id")
+    assert same == {"inserted": 0, "updated": 0, "unchanged": 1}
+    assert col.bulk_writes == writes        # nothing was sent
+
+    changed = harvest.upsert_docs(col, [{"video_id": "v1", "view_count": 2},
+                                        {"video_id": "v2", "view_count": 5}], "video_id")
+    assert changed == {"inserted": 0, "updated": 1, "unchanged": 1}
+    assert col.find_one({"video_id": "v1"})["view_count"] == 2
+
+
+# ---- Pruning after a harvest ---- #
+LISTED_VIDEO = "aaaaaaaaaa1"
+STORED_VIDEO = "bbbbbbbbbb2"
+
+
+def run_harvest(monkeypatch, uploads_complete):
+    mg_db = FakeDB({
+        harvest.VIDEOS_COL:    FakeCollection([{"video_id": STORED_VIDEO, "channel_id": "c1"}]),
+        harvest.PLAYLISTS_COL: FakeCollection([{"playlist_id": "p_old", "channel_id": "c1"}]),
+    })
+
+    def walk(playlist_id, first_response=None, stop_ids=None):
+        yield [LISTED_VIDEO]
+        if playlist_id == "UU1" and not uploads_complete:
+            raise harvest.ListingIncomplete("playlist UU1 could not be listed")
+
+    def details(video_ids):
+        yield [{"video_id": vid, "comment_count": 0} for vid in video_ids], []
+
+    monkeypatch.setattr(harvest, "get_channel_stats", lambda cid: {
+        "Channel_Id": "c1", "Channel_name": "Chan", "Total_videos": 2, "playlist_id": "UU1"})
+    monkeypatch.setattr(harvest, "fetch_channel_playlists", lambda cid, name: (
+        [{"playlist_id": "p1", "playlist_name": "P", "item_count": 1}], True))
+    monkeypatch.setattr(harvest, "safe_batch_api_call", lambda fns, **kw: [None] * len(fns))
+    monkeypatch.setattr(harvest, "iter_playlist_video_ids", walk)
+    monkeypatch.setattr(harvest, "iter_video_details", details)
+    monkeypatch.setattr(harvest, "get_comments_for_videos",
+                        lambda ids, max_comments=20: {vid: [] for vid in ids})
+    monkeypatch.setattr(harvest, "get_quota_remaining", lambda: 10 ** 6)
+    monkeypatch.setattr(harvest, "refresh_channel_summary", lambda db, cid: {harvest.COMMENTS_COL: 0})
+
+    assert harvest.extract_channel_all_details("c1", mg_db)
+    return mg_db
+
+
+def test_partial_listing_keeps_unlisted_videos_and_playlists(monkeypatch):
+    mg_db = run_harvest(monkeypatch, uploads_complete=False)
+    assert set(mg_db[harvest.VIDEOS_COL].distinct("video_id")) == {LISTED_VIDEO, STORED_VIDEO}
+    assert set(mg_db[harvest.PLAYLISTS_COL].distinct("playlist_id")) == {"p1", "p_old"}
+
+
+def test_complete_listing_prunes_unlisted_videos_and_playlists(monkeypatch):
+    mg_db = run_harvest(monkeypatch, uploads_complete=True)
+    assert mg_db[harvest.VIDEOS_COL].distinct("video_id") == [LISTED_VIDEO]
+    assert mg_db[harvest.PLAYLISTS_COL].distinct("playlist_id") == ["p1"]
@@ -0,0 +1,41 @@
+import pytest
+
+nlp = pytest.importorskip("nlp")
+
+TEXTS = [
+    "I absolutely love this video, great work!",
+    "This is the worst upload I have ever seen.",
+    "Ceci est une vidéo très intéressante.",
+    "Das war wirklich ein schlechtes Video.",
+    "",
+    "Meh, it was okay I guess.",
+    "Esta canción es maravillosa.",
+]
+
+
+def chunks(size):
+    return [TEXTS[i:i + size] for i in range(0, len(TEXTS), size)]
+
+
+def test_iter_scores_empty_input_yields_nothing():
+    assert list(nlp.iter_scores(iter([]), workers=4)) == []
+
+
+def test_iter_scores_serial_matches_score_chunk():
+    nlp._init_worker()
+    expected = [nlp.score_chunk(c) for c in chunks(2)]
+    assert list(nlp.iter_scores(chunks(2), workers=1)) == expected
+
+
+def test_iter_scores_pool_keeps_input_order():
+    # More chunks than 2 × workers, so results are read back while others are queued
+    serial = list(nlp.iter_scores(chunks(1), workers=1))
+    pooled = list(nlp.iter_scores(iter(chunks(1)), workers=2))
+    assert pooled == serial
+    assert [len(c) for c in pooled] == [1] * len(TEXTS)
+
+
+def test_score_text_blank_comment_defaults_language():
+    lang, sentiment = nlp.score_text("   ")
+    assert lang == nlp.DEFAULT_LANGUAGE
+    assert sentiment == 0.0
@@ -0,0 +1,71 @@
+import csv
+import io
+
+import pytest
+
+postgres_db = pytest.importorskip("postgres_db")
+from psycopg2 import sql
+
+
+def render(composable):
+    """SQL text of a psycopg2 composable, without needing a live connection."""
+    if isinstance(composable, sql.Composed):
+        return "".join(render(part) for part in composable.seq)
+    if isinstance(composable, sql.Identifier):
+        return ".".join('"' + s.replace('"', '""') + '"' for s in composable.strings)
+    if isinstance(composable, sql.SQL):
+        return composable.string
+    raise TypeError(f"unexpected composable {composable!r}")
+
+
+# ---- COPY CSV fields ---- #
+def test_copy_field_null_and_empty_string_differ():
+    assert postgres_db.copy_field(None) == r"\N"
+    assert postgres_db.copy_field("") == '""'
+
+
+def test_copy_field_quotes_literal_null_marker():
+    # A quoted \N is read by COPY as the two characters, not as NULL
+    assert postgres_db.copy_field(r"\N") == '"\\N"'
+
+
+def test_copy_field_round_trips_through_csv():
+    row = ("a,b", 'say "hi"', "line\nbreak", 42, 1.5, True)
+    line = ",".join(map(postgres_db.copy_field, row)) + "\n"
+    assert next(csv.reader(io.StringIO(line))) == ["a,b", 'say "hi"', "line\nbreak", "42", "1.5", "True"]
+
+
+# ---- ON CONFLICT clause ---- #
+def test_key_columns():
+    assert postgres_db.key_columns("video_id") == ("video_id",)
+    assert postgres_db.key_columns(["video_id", "playlist_id"]) == ("video_id", "playlist_id")
+
+
+def test_upsert_clause_skips_volatile_columns_in_change_check():
+    clause = postgres_db.upsert_clause(
+        "channel_playlist", ["playlist_id", "item_count", "harvested_at"], "playlist_id")
+    assert render(clause) == (
+        'ON CONFLICT ("playlist_id") DO UPDATE SET '
+        '"item_count" = EXCLUDED."item_count", "harvested_at" = EXCLUDED."harvested_at" '
+        'WHERE ("channel_playlist"."item_count") IS DISTINCT FROM ("excluded"."item_count")'
+    )
+
+
+def test_upsert_clause_composite_key():
+    clause = postgres_db.upsert_clause(
+        "video_playlist", ["video_id", "playlist_id", "channel_id"], ("video_id", "playlist_id"))
+    assert render(clause) == (
+        'ON CONFLICT ("video_id", "playlist_id") DO UPDATE SET "channel_id" = EXCLUDED."channel_id" '
+        'WHERE ("video_playlist"."channel_id") IS DISTINCT FROM ("excluded"."channel_id")'
+    )
+
+
+# ---- Row builders ---- #
+def test_video_playlist_rows_deduplicates_membership():
+    video = {"video_id": "v1", "playlist_ids": ["p1", "p2", "p1"]}
+    assert postgres_db.video_playlist_rows(video, "c1") == [("v1", "p1", "c1"), ("v1", "p2", "c1")]
+
+
+def test_video_playlist_rows_falls_back_to_playlist_id():
+    assert postgres_db.video_playlist_rows({"video_id": "v1", "playlist_id": "p1"}, "c1") == [("v1", "p1", "c1")]
+    assert postgres_db.video_playlist_rows({"video_id": "v1", "playlist_id": None}, "c1") == []